@@ -1,44 +1,282 @@
-from flask import Flask, request, jsonify, send_file, render_template_string, send_from_directory
+from flask import Flask, Request, Response, request, jsonify, send_file, render_template_string, send_from_directory, make_response, abort
 from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import os
+import io
+import gc
 import tempfile
 import json
 import time
+import uuid
+import threading
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 from improved_ppt_processor import ImprovedPPTProcessor
-from llm_integration import LLMIntegration
+from llm_integration import get_llm_integration
 from pptx import Presentation
 from error_handler import (
-    safe_api_call, 
+    robust_api_call,
     validate_file_upload, 
     validate_text_input,
     validate_api_key,
+    validate_template_package,
     PPTGeneratorError,
     FileValidationError,
     LLMError,
     TemplateError,
     ProgressTracker,
     create_error_response,
+    ALLOWED_EXTENSIONS,
     logger
 )
 from retry_handler import retry_file_operation, RetryableOperation, RetryConfigs
-import traceback
-
-app = Flask(__name__, static_folder='static')
-CORS(app)
+from cache_handler import LRUCache, file_digest
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-ALLOWED_EXTENSIONS = {'pptx', 'potx'}
+_ALLOWED_SUFFIXES = tuple(f'.{ext}' for ext in sorted(ALLOWED_EXTENSIONS))
+USE_PROMPT_CACHE = os.environ.get('LLM_PROMPT_CACHE', 'true').lower() != 'false'
+# Internal nginx location that maps to UPLOAD_FOLDER (e.g. /internal-uploads/); unset serves files from Flask
+UPLOADS_ACCEL_REDIRECT = os.environ.get('UPLOADS_ACCEL_REDIRECT', '')
+
+# Generated files older than this are swept from UPLOAD_FOLDER
+UPLOAD_MAX_AGE = 60 * 60  # 1 hour
+UPLOAD_SWEEP_INTERVAL = 5 * 60  # 5 minutes
+SWEPT_PREFIXES = ('generated_presentation_', 'presentation_', 'single_slide_test_', 'upload_')
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Deletes uploads off the request thread so responses aren't held up by disk I/O
+_CLEANUP_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cleanup')
+
+def _remove_file(path):
+    """Remove a file, ignoring ones that are already gone"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("⚠️  Warning: Could not remove %s: %s", path, e)
+
+class UploadRequest(Request):
+    """Request that streams uploaded files straight into UPLOAD_FOLDER as they arrive"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spooled_paths = []
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        suffix = os.path.splitext(secure_filename(filename or ''))[1]
+        stream = tempfile.NamedTemporaryFile('wb+', dir=UPLOAD_FOLDER, prefix='upload_', suffix=suffix, delete=False)
+        self.spooled_paths.append(stream.name)
+        return stream
+    
+    def close(self):
+        """Close uploaded files and remove any the view didn't clean up (e.g. rejected requests)"""
+        super().close()
+        for path in self.spooled_paths:
+            _CLEANUP_EXECUTOR.submit(_remove_file, path)
+        self.spooled_paths = []
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, which serializes straight to bytes"""
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if kwargs.get('indent') else 0)
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype)
+
+app = Flask(__name__, static_folder='static')
+app.json = OrjsonProvider(app)
+app.request_class = UploadRequest
+CORS(app)
+
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
+# (template_hash, llm_provider, model) -> (raw_template_data, manifest)
+MANIFEST_CACHE = LRUCache(maxsize=128)
+# Same key -> serialized /api/generate-manifest body, minus the per-upload template_filename
+MANIFEST_RESPONSE_CACHE = LRUCache(maxsize=128)
+
+# The processor holds no per-request state, so one instance serves every request
+_PROCESSOR = ImprovedPPTProcessor()
+
+# Constant response bodies, serialized once at import
+_HEALTH_BODY = orjson.dumps({'status': 'healthy', 'message': 'PPT Generator API is running'})
+_PROVIDERS_BODY = orjson.dumps({
+    'providers': [
+        {'id': 'openai', 'name': 'OpenAI (GPT-4)'},
+        {'id': 'anthropic', 'name': 'Anthropic (Claude)'},
+        {'id': 'gemini', 'name': 'Google Gemini'}
+    ]
+})
+
+# Runs content structuring alongside manifest generation; both are network-bound LLM calls
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm')
+
+def _sweep_uploads():
+    """Periodically delete generated presentations and stray uploads older than UPLOAD_MAX_AGE"""
+    while True:
+        cutoff = time.time() - UPLOAD_MAX_AGE
+        try:
+            with os.scandir(UPLOAD_FOLDER) as entries:
+                for entry in entries:
+                    if entry.name.startswith(SWEPT_PREFIXES) and entry.stat().st_mtime < cutoff:
+                        _remove_file(entry.path)
+        except OSError as e:
+            logger.warning("⚠️  Warning: Upload sweep failed: %s", e)
+        time.sleep(UPLOAD_SWEEP_INTERVAL)
+
+_sweeper_started = False
+_sweeper_lock = threading.Lock()
+
+@app.before_request
+def start_upload_sweeper():
+    """Start the sweeper on the first request so each (possibly forked) worker runs its own"""
+    global _sweeper_started
+    if _sweeper_started:
+        return
+    with _sweeper_lock:
+        if not _sweeper_started:
+            threading.Thread(target=_sweep_uploads, name='upload-sweeper', daemon=True).start()
+            _sweeper_started = True
+
+# Endpoints that receive a multipart template upload
+UPLOAD_ENDPOINTS = {
+    'generate_presentation',
+    'generate_manifest',
+    'test_template_extraction_api',
+    'test_single_slide_api',
+    'generate_presentation_with_preview',
+}
+
+@app.before_request
+def reject_bad_uploads():
+    """Reject uploads from their headers alone, before any of the body is read"""
+    # Only the POST carries the upload; CORS preflight OPTIONS requests must pass through untouched
+    if request.method != 'POST' or request.endpoint not in UPLOAD_ENDPOINTS:
+        return None
+    if request.content_length is not None and request.content_length > MAX_FILE_SIZE:
+        abort(413)
+    if request.mimetype != 'multipart/form-data':
+        return jsonify({'error': 'Template must be uploaded as multipart/form-data'}), 415
+    if 'X-Api-Key' in request.headers and not request.headers['X-Api-Key'].strip():
+        return jsonify({'error': 'API key is required'}), 400
+    return None
+
+def get_api_key():
+    """Read the API key from the X-Api-Key header, falling back to the api_key form field"""
+    return request.headers.get('X-Api-Key', '').strip() or request.form.get('api_key', '').strip()
+
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
+
+def save_template_upload(template_file):
+    """
+    Return (template_filename, template_path) for an upload already spooled to disk by UploadRequest
+    Raises FileValidationError if the upload isn't a PowerPoint package; UploadRequest removes the file
+    """
+    template_filename = secure_filename(template_file.filename)
+    template_path = template_file.stream.name
+    template_file.close()
+    validate_template_package(template_path)
+    return template_filename, template_path
+
+def remove_upload(template_path):
+    """Delete a saved template upload in the background"""
+    if template_path in request.spooled_paths:
+        request.spooled_paths.remove(template_path)
+    _CLEANUP_EXECUTOR.submit(_remove_file, template_path)
+
+def manifest_cache_key(template_hash, llm_integration):
+    return (template_hash, llm_integration.provider, llm_integration.model)
+
+def require_template_upload(failure_message, require_text=False, require_api_key=False):
+    """
+    Validate and save the template upload, then call the view as view(template_filename, template_path, form)
+    The saved template is removed when the view returns; unexpected errors become a 500 prefixed with failure_message
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper():
+            try:
+                # Validate request
+                if 'template' not in request.files:
+                    return jsonify({'error': 'No template file provided'}), 400
+                
+                template_file = request.files['template']
+                if template_file.filename == '':
+                    return jsonify({'error': 'No template file selected'}), 400
+                
+                if not allowed_file(template_file.filename):
+                    return jsonify({'error': 'Invalid file type. Only .pptx and .potx files are allowed'}), 400
+                
+                # Get form data
+                form = {
+                    'text': request.form.get('text', '').strip(),
+                    'guidance': request.form.get('guidance', '').strip(),
+                    'api_key': get_api_key(),
+                    'llm_provider': request.form.get('llm_provider', 'openai').strip(),
+                    'include_speaker_notes': request.form.get('include_speaker_notes', 'false').lower() == 'true',
+                    'no_cache': request.form.get('no_cache', 'false').lower() == 'true',
+                }
+                
+                if require_text and not form['text']:
+                    return jsonify({'error': 'Input text is required'}), 400
+                
+                if require_api_key and not form['api_key']:
+                    return jsonify({'error': 'API key is required'}), 400
+                
+                # Save uploaded template
+                template_filename, template_path = save_template_upload(template_file)
+                try:
+                    return view(template_filename, template_path, form)
+                finally:
+                    # Cleanup uploaded file
+                    remove_upload(template_path)
+            
+            except FileValidationError as e:
+                return jsonify({'error': e.user_message}), 400
+            except Exception as e:
+                logger.exception("%s: %s", failure_message, e)
+                return jsonify({'error': f'{failure_message}: {str(e)}'}), 500
+        return wrapper
+    return decorator
+
+def get_template_manifest(template_path, ppt_processor, llm_integration, prs=None, no_cache=False, template_hash=None):
+    """
+    Extract template data and generate its manifest, reusing cached results for repeat templates
+    Pass the already-loaded Presentation as prs to avoid parsing the template a second time
+    no_cache bypasses MANIFEST_CACHE entirely: nothing is read from it or stored in it
+    """
+    cache_key = manifest_cache_key(template_hash or file_digest(template_path), llm_integration)
+    cached = None if no_cache else MANIFEST_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug("♻️  Template manifest served from cache")
+        return cached
+    
+    raw_template_data = ppt_processor.extract_raw_template_data(prs if prs is not None else template_path)
+    try:
+        manifest = llm_integration.generate_template_manifest(raw_template_data, use_fallback=False)
+    except Exception as e:
+        # Don't cache the fallback so the next upload of this template retries the LLM
+        logger.warning("Manifest generation failed, using fallback: %s", e)
+        return raw_template_data, llm_integration._create_fallback_manifest(raw_template_data)
+    
+    if not no_cache:
+        MANIFEST_CACHE.set(cache_key, (raw_template_data, manifest))
+    return raw_template_data, manifest
 
 @app.route('/')
 def index():
@@ -62,6 +300,12 @@ def test_full_flow():
 
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
+    if UPLOADS_ACCEL_REDIRECT:
+        # Let the reverse proxy stream the file from disk; Python only returns headers
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = UPLOADS_ACCEL_REDIRECT.rstrip('/') + '/' + secure_filename(filename)
+        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+        return response
     return send_from_directory(UPLOAD_FOLDER, filename)
 
 @app.route('/<path:filename>')
@@ -70,344 +314,211 @@ def static_files(filename):
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'PPT Generator API is running'})
+    return Response(_HEALTH_BODY, mimetype='application/json')
 
 @app.route('/api/generate-presentation', methods=['POST'])
-def generate_presentation():
-    try:
-        # Validate request
-        if 'template' not in request.files:
-            return jsonify({'error': 'No template file provided'}), 400
-        
-        template_file = request.files['template']
-        if template_file.filename == '':
-            return jsonify({'error': 'No template file selected'}), 400
-        
-        if not allowed_file(template_file.filename):
-            return jsonify({'error': 'Invalid file type. Only .pptx and .potx files are allowed'}), 400
-        
-        # Get form data
-        input_text = request.form.get('text', '').strip()
-        guidance = request.form.get('guidance', '').strip()
-        api_key = request.form.get('api_key', '').strip()
-        llm_provider = request.form.get('llm_provider', 'openai').strip()
-        include_speaker_notes = request.form.get('include_speaker_notes', 'false').lower() == 'true'
-        
-        if not input_text:
-            return jsonify({'error': 'Input text is required'}), 400
-        
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
-        
-        # Save uploaded template
-        template_filename = secure_filename(template_file.filename)
-        template_path = os.path.join(UPLOAD_FOLDER, template_filename)
-        template_file.save(template_path)
-        
-        try:
-            print(f"🚀 Starting manifest-based presentation generation...")
-            print(f"   Speaker notes enabled: {include_speaker_notes}")
-            
-            # Initialize processors
-            ppt_processor = ImprovedPPTProcessor()
-            llm_integration = LLMIntegration(api_key, llm_provider)
-            
-            # Step 1: Extract raw template data
-            raw_template_data = ppt_processor.extract_raw_template_data(template_path)
-            print(f"🔍 Raw template data extracted")
-            
-            # Step 2: Generate manifest using LLM
-            manifest = llm_integration.generate_template_manifest(raw_template_data)
-            print(f"🧠 Template manifest generated with {len(manifest.get('layouts', []))} layout rules")
-            
-            # Step 3: Structure the content using LLM
-            slide_structure = llm_integration.structure_text_to_slides(input_text, guidance)
-            print(f"📋 Content structured into {len(slide_structure.get('slides', []))} slides")
-            print(f"🔍 Debug: First slide structure = {slide_structure.get('slides', [{}])[0] if slide_structure.get('slides') else 'No slides found'}")
-            
-            # Step 4: Generate presentation using manifest
-            prs = ppt_processor.generate_presentation_with_manifest(slide_structure, template_path, manifest)
-            
-            # Step 5: Save the presentation
-            timestamp = int(time.time())
-            output_filename = f'generated_presentation_{timestamp}.pptx'
-            output_path = os.path.join(UPLOAD_FOLDER, output_filename)
-            prs.save(output_path)
-            
-            print(f"✅ Manifest-based presentation generated successfully")
-            
-            # Return the generated file
-            return send_file(
-                output_path,
-                as_attachment=True,
-                download_name=output_filename,
-                mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-            )
-            
-        finally:
-            # Cleanup uploaded file
-            if os.path.exists(template_path):
-                os.remove(template_path)
-        
-    except Exception as e:
-        print(f"Error generating presentation: {str(e)}")
-        print(traceback.format_exc())
-        return jsonify({'error': f'Failed to generate presentation: {str(e)}'}), 500
+@require_template_upload('Failed to generate presentation', require_text=True, require_api_key=True)
+def generate_presentation(template_filename, template_path, form):
+    input_text, guidance = form['text'], form['guidance']
+    include_speaker_notes, no_cache = form['include_speaker_notes'], form['no_cache']
+    
+    logger.info("🚀 Starting manifest-based presentation generation...")
+    logger.debug("   Speaker notes enabled: %s", include_speaker_notes)
+    
+    # Shared processors
+    ppt_processor = _PROCESSOR
+    llm_integration = get_llm_integration(form['api_key'], form['llm_provider'], use_prompt_cache=USE_PROMPT_CACHE)
+    
+    # Step 3 (concurrently): Structure the content using LLM
+    structure_future = _LLM_EXECUTOR.submit(llm_integration.structure_text_to_slides, input_text, guidance, no_cache)
+    
+    # Step 1 & 2: Extract raw template data and generate manifest using LLM
+    # The template is parsed once and reused for extraction and generation
+    prs = Presentation(template_path)
+    raw_template_data, manifest = get_template_manifest(template_path, ppt_processor, llm_integration, prs, no_cache)
+    logger.debug("🧠 Template manifest generated with %d layout rules", len(manifest.get('layouts', [])))
+    
+    slide_structure = structure_future.result()
+    logger.debug("📋 Content structured into %d slides", len(slide_structure.get('slides', [])))
+    logger.debug("🔍 Debug: First slide structure = %s", slide_structure['slides'][0] if slide_structure.get('slides') else 'No slides found')
+    
+    # Step 4: Generate presentation using manifest
+    prs = ppt_processor.generate_presentation_with_manifest(slide_structure, prs, manifest)
+    
+    # Step 5: Save the presentation in memory; nothing needs it on disk after this response
+    output_filename = f'generated_presentation_{uuid.uuid4().hex}.pptx'
+    output_buffer = io.BytesIO()
+    prs.save(output_buffer)
+    output_buffer.seek(0)
+    
+    logger.info("✅ Manifest-based presentation generated successfully")
+    
+    # Return the generated file
+    return send_file(
+        output_buffer,
+        as_attachment=True,
+        download_name=output_filename,
+        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
+    )
 
 @app.route('/api/generate-manifest', methods=['POST'])
-def generate_manifest():
+@require_template_upload('Failed to generate manifest', require_api_key=True)
+def generate_manifest(template_filename, template_path, form):
     """Generate template manifest using LLM analysis"""
-    try:
-        # Validate request
-        if 'template' not in request.files:
-            return jsonify({'error': 'No template file provided'}), 400
-        
-        template_file = request.files['template']
-        if template_file.filename == '':
-            return jsonify({'error': 'No template file selected'}), 400
-        
-        if not allowed_file(template_file.filename):
-            return jsonify({'error': 'Invalid file type. Only .pptx and .potx files are allowed'}), 400
-        
-        # Get form data
-        api_key = request.form.get('api_key', '').strip()
-        llm_provider = request.form.get('llm_provider', 'openai').strip()
-        
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
-        
-        # Save uploaded template
-        template_filename = secure_filename(template_file.filename)
-        template_path = os.path.join(UPLOAD_FOLDER, template_filename)
-        template_file.save(template_path)
-        
-        try:
-            print(f"🔍 Generating manifest for template: {template_filename}")
-            
-            # Initialize processors
-            ppt_processor = ImprovedPPTProcessor()
-            llm_integration = LLMIntegration(api_key, llm_provider)
-            
-            # Step 1: Extract raw template data (deterministic)
-            raw_data = ppt_processor.extract_raw_template_data(template_path)
-            
-            # Step 2: Use LLM to generate structured manifest
-            manifest = llm_integration.generate_template_manifest(raw_data)
-            
-            print(f"✅ Manifest generated successfully")
-            
-            # Return both raw data and manifest for comparison
-            return jsonify({
-                'raw_template_data': raw_data,
-                'llm_manifest': manifest,
-                'template_filename': template_filename
-            })
-            
-        finally:
-            # Cleanup uploaded file
-            if os.path.exists(template_path):
-                os.remove(template_path)
-        
-    except Exception as e:
-        print(f"Error generating manifest: {str(e)}")
-        print(traceback.format_exc())
-        return jsonify({'error': f'Failed to generate manifest: {str(e)}'}), 500
+    logger.info("🔍 Generating manifest for template: %s", template_filename)
+    
+    # Shared processors
+    ppt_processor = _PROCESSOR
+    llm_integration = get_llm_integration(form['api_key'], form['llm_provider'], use_prompt_cache=USE_PROMPT_CACHE)
+    
+    # Repeat templates are served from the pre-serialized body, unless the client asked for a fresh manifest
+    no_cache = form['no_cache']
+    cache_key = manifest_cache_key(file_digest(template_path), llm_integration)
+    body = None if no_cache else MANIFEST_RESPONSE_CACHE.get(cache_key)
+    if body is None:
+        # Step 1 & 2: Extract raw template data (deterministic) and use LLM to generate structured manifest
+        raw_data, manifest = get_template_manifest(template_path, ppt_processor, llm_integration, no_cache=no_cache, template_hash=cache_key[0])
+        body = orjson.dumps({'raw_template_data': raw_data, 'llm_manifest': manifest}, option=orjson.OPT_NON_STR_KEYS)
+        # Only LLM manifests land in MANIFEST_CACHE; fallbacks shouldn't be replayed
+        if not no_cache and MANIFEST_CACHE.get(cache_key) is not None:
+            MANIFEST_RESPONSE_CACHE.set(cache_key, body)
+    
+    logger.info("✅ Manifest generated successfully")
+    
+    # Return both raw data and manifest for comparison
+    return Response(
+        body[:-1] + b',"template_filename":' + orjson.dumps(template_filename) + b'}\n',
+        mimetype='application/json'
+    )
 
 @app.route('/api/test-template-extraction', methods=['POST'])
-def test_template_extraction_api():
+@require_template_upload('Failed to extract template')
+def test_template_extraction_api(template_filename, template_path, form):
     """Test template extraction without LLM - core extraction only"""
-    try:
-        # Validate request
-        if 'template' not in request.files:
-            return jsonify({'error': 'No template file provided'}), 400
-        
-        template_file = request.files['template']
-        if template_file.filename == '':
-            return jsonify({'error': 'No template file selected'}), 400
-        
-        if not allowed_file(template_file.filename):
-            return jsonify({'error': 'Invalid file type. Only .pptx and .potx files are allowed'}), 400
-        
-        # Save uploaded template
-        template_filename = secure_filename(template_file.filename)
-        template_path = os.path.join(UPLOAD_FOLDER, template_filename)
-        template_file.save(template_path)
-        
-        try:
-            print(f"🔍 Testing template extraction: {template_filename}")
-            
-            # Initialize processor
-            ppt_processor = ImprovedPPTProcessor()
-            
-            # Extract template data (this is what we're testing)
-            raw_data = ppt_processor.extract_raw_template_data(template_path)
-            
-            print(f"✅ Template extraction successful")
-            
-            return jsonify({
-                'success': True,
-                'template_filename': template_filename,
-                'basic_info': {
-                    'slide_width': raw_data.get('slide_size', {}).get('width_emu', 0),
-                    'slide_height': raw_data.get('slide_size', {}).get('height_emu', 0),
-                    'total_layouts': len(raw_data.get('layouts', [])),
-                    'total_images': len(raw_data.get('images', []))
-                },
-                'layouts': raw_data.get('layouts', []),
-                'theme': raw_data.get('theme', {}),
-                'images': raw_data.get('images', []),
-                'slide_size': raw_data.get('slide_size', {})
-            })
-            
-        finally:
-            # Cleanup uploaded file
-            if os.path.exists(template_path):
-                os.remove(template_path)
-        
-    except Exception as e:
-        print(f"Error testing template extraction: {str(e)}")
-        print(traceback.format_exc())
-        return jsonify({'error': f'Failed to extract template: {str(e)}'}), 500
+    logger.info("🔍 Testing template extraction: %s", template_filename)
+    
+    # Shared processor
+    ppt_processor = _PROCESSOR
+    
+    # Extract template data (this is what we're testing)
+    raw_data = ppt_processor.extract_raw_template_data(template_path)
+    
+    logger.info("✅ Template extraction successful")
+    
+    return jsonify({
+        'success': True,
+        'template_filename': template_filename,
+        'basic_info': {
+            'slide_width': raw_data.get('slide_size', {}).get('width_emu', 0),
+            'slide_height': raw_data.get('slide_size', {}).get('height_emu', 0),
+            'total_layouts': len(raw_data.get('layouts', [])),
+            'total_images': len(raw_data.get('images', []))
+        },
+        'layouts': raw_data.get('layouts', []),
+        'theme': raw_data.get('theme', {}),
+        'images': raw_data.get('images', []),
+        'slide_size': raw_data.get('slide_size', {})
+    })
 
 @app.route('/api/test-single-slide', methods=['POST'])
-def test_single_slide_api():
+@require_template_upload('Failed to generate single slide', require_text=True, require_api_key=True)
+def test_single_slide_api(template_filename, template_path, form):
     """Test single slide generation - LLM content + template layout matching"""
-    try:
-        # Validate request
-        if 'template' not in request.files:
-            return jsonify({'error': 'No template file provided'}), 400
-        
-        template_file = request.files['template']
-        if template_file.filename == '':
-            return jsonify({'error': 'No template file selected'}), 400
-        
-        if not allowed_file(template_file.filename):
-            return jsonify({'error': 'Invalid file type. Only .pptx and .potx files are allowed'}), 400
-        
-        # Get form data
-        input_text = request.form.get('text', '').strip()
-        api_key = request.form.get('api_key', '').strip()
-        llm_provider = request.form.get('llm_provider', 'openai').strip()
-        
-        if not input_text:
-            return jsonify({'error': 'Input text is required'}), 400
-        
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
-        
-        # Save uploaded template
-        template_filename = secure_filename(template_file.filename)
-        template_path = os.path.join(UPLOAD_FOLDER, template_filename)
-        template_file.save(template_path)
-        
-        try:
-            print(f"🧪 Testing single slide generation: {template_filename}")
-            
-            # Step 1: Initialize processors
-            ppt_processor = ImprovedPPTProcessor()
-            llm_integration = LLMIntegration(api_key, llm_provider)
-            
-            # Step 2: Generate slide content with LLM
-            slide_structure = llm_integration.structure_text_to_slides(input_text, "Create a professional slide")
-            
-            if not slide_structure.get('slides'):
-                return jsonify({'error': 'LLM failed to generate slide content'}), 500
-            
-            # Take only the first slide for testing
-            first_slide = slide_structure['slides'][0]
-            
-            # Step 3: Extract template data and generate manifest
-            raw_template_data = ppt_processor.extract_raw_template_data(template_path)
-            manifest = llm_integration.generate_template_manifest(raw_template_data)
-            
-            # Step 4: Generate single slide
-            prs = Presentation(template_path)
-            
-            # Clear existing slides
-            slide_count = len(prs.slides)
-            for i in range(slide_count - 1, -1, -1):
-                rId = prs.slides._sldIdLst[i].rId
-                prs.part.drop_rel(rId)
-                del prs.slides._sldIdLst[i]
-            
-            # Create the test slide
-            slide_idx = 0
-            layout_choice = ppt_processor._resolve_layout_from_manifest(first_slide, manifest, slide_idx, prs)
-            layout_matched = layout_choice is not None
-            
-            if not layout_choice:
-                layout_choice = prs.slide_layouts[1] if len(prs.slide_layouts) > 1 else prs.slide_layouts[0]
-            
-            slide = prs.slides.add_slide(layout_choice)
-            
-            # Apply content and styling
-            ppt_processor._apply_manifest_styling(slide, first_slide, manifest)
-            ppt_processor._add_manifest_assets(slide, manifest, slide_idx)
-            
-            # Step 5: Save and verify result
-            timestamp = int(time.time())
-            output_filename = f'single_slide_test_{timestamp}.pptx'
-            output_path = os.path.join(UPLOAD_FOLDER, output_filename)
-            prs.save(output_path)
-            
-            # Verify the result
-            verify_prs = Presentation(output_path)
-            verify_slide = verify_prs.slides[0] if len(verify_prs.slides) > 0 else None
-            
-            title_applied = False
-            content_applied = False
-            final_title = ""
-            final_content = ""
-            content_shapes = 0
-            
-            if verify_slide:
-                # Check title
-                if hasattr(verify_slide.shapes, 'title') and verify_slide.shapes.title:
-                    final_title = verify_slide.shapes.title.text
-                    title_applied = bool(final_title.strip())
-                
-                # Check content
-                for shape in verify_slide.shapes:
-                    if (hasattr(shape, 'text_frame') and 
-                        shape.text_frame and 
-                        shape != getattr(verify_slide.shapes, 'title', None)):
-                        if shape.text_frame.text.strip():
-                            content_shapes += 1
-                            final_content = shape.text_frame.text
-                            content_applied = True
-                            break
-            
-            print(f"✅ Single slide test completed")
-            
-            return jsonify({
-                'success': title_applied and content_applied,
-                'llm_success': True,
-                'layout_matched': layout_matched,
-                'content_applied': content_applied,
-                'title_applied': title_applied,
-                'generated_slide': first_slide,
-                'layout_used': layout_choice.name,
-                'available_layouts': len(prs.slide_layouts),
-                'final_title': final_title,
-                'final_content': final_content[:100] + "..." if len(final_content) > 100 else final_content,
-                'content_shapes': content_shapes,
-                'template_filename': template_filename,
-                'download_url': f'/uploads/{output_filename}' if os.path.exists(output_path) else None,
-                'file_size': os.path.getsize(output_path) if os.path.exists(output_path) else 0
-            })
-            
-        finally:
-            # Cleanup uploaded template (but keep generated file for download)
-            if os.path.exists(template_path):
-                os.remove(template_path)
-        
-    except Exception as e:
-        print(f"Error testing single slide generation: {str(e)}")
-        print(traceback.format_exc())
-        return jsonify({'error': f'Failed to generate single slide: {str(e)}'}), 500
+    input_text = form['text']
+    
+    logger.info("🧪 Testing single slide generation: %s", template_filename)
+    
+    # Step 1: Shared processors
+    ppt_processor = _PROCESSOR
+    llm_integration = get_llm_integration(form['api_key'], form['llm_provider'], use_prompt_cache=USE_PROMPT_CACHE)
+    
+    # Step 2: Generate slide content with LLM
+    slide_structure = llm_integration.structure_text_to_slides(input_text, "Create a professional slide")
+    
+    if not slide_structure.get('slides'):
+        return jsonify({'error': 'LLM failed to generate slide content'}), 500
+    
+    # Take only the first slide for testing
+    first_slide = slide_structure['slides'][0]
+    
+    # Step 3: Extract template data and generate manifest
+    prs = Presentation(template_path)
+    raw_template_data, manifest = get_template_manifest(template_path, ppt_processor, llm_integration, prs)
+    
+    # Step 4: Generate single slide
+    
+    # Trace template assets to their images, then clear existing slides
+    asset_parts = ppt_processor._resolve_manifest_assets(prs, manifest)
+    ppt_processor._clear_all_slides(prs)
+    
+    # Create the test slide
+    slide_idx = 0
+    layout_choice = ppt_processor._resolve_layout_from_manifest(first_slide, manifest, slide_idx, prs)
+    layout_matched = layout_choice is not None
+    
+    if not layout_choice:
+        layout_choice = prs.slide_layouts[1] if len(prs.slide_layouts) > 1 else prs.slide_layouts[0]
+    
+    slide = prs.slides.add_slide(layout_choice)
+    
+    # Apply content and styling
+    ppt_processor._apply_manifest_styling(slide, first_slide, manifest)
+    ppt_processor._add_manifest_assets(slide, slide_idx, asset_parts)
+    
+    # Step 5: Save and verify result
+    # Unique per request: concurrent requests must never share an output path
+    output_filename = f'single_slide_test_{uuid.uuid4().hex}.pptx'
+    output_path = os.path.join(UPLOAD_FOLDER, output_filename)
+    prs.save(output_path)
+    
+    # Verify the result
+    verify_prs = Presentation(output_path)
+    verify_slide = verify_prs.slides[0] if len(verify_prs.slides) > 0 else None
+    
+    title_applied = False
+    content_applied = False
+    final_title = ""
+    final_content = ""
+    content_shapes = 0
+    
+    if verify_slide:
+        # Check title (looked up once; each .title access searches the shape tree)
+        title_shape = verify_slide.shapes.title
+        if title_shape:
+            final_title = title_shape.text
+            title_applied = bool(final_title.strip())
+    
+        # Check content
+        for shape in verify_slide.shapes:
+            if shape.has_text_frame and shape != title_shape:
+                shape_text = shape.text_frame.text
+                if shape_text.strip():
+                    content_shapes += 1
+                    final_content = shape_text
+                    content_applied = True
+                    break
+    
+    logger.info("✅ Single slide test completed")
+    
+    return jsonify({
+        'success': title_applied and content_applied,
+        'llm_success': True,
+        'layout_matched': layout_matched,
+        'content_applied': content_applied,
+        'title_applied': title_applied,
+        'generated_slide': first_slide,
+        'layout_used': layout_choice.name,
+        'available_layouts': len(prs.slide_layouts),
+        'final_title': final_title,
+        'final_content': final_content[:100] + "..." if len(final_content) > 100 else final_content,
+        'content_shapes': content_shapes,
+        'template_filename': template_filename,
+        'download_url': f'/uploads/{output_filename}' if os.path.exists(output_path) else None,
+        'file_size': os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    })
 
 @app.route('/api/generate-presentation-with-preview', methods=['POST'])
-@safe_api_call
+@robust_api_call()
 def generate_presentation_with_preview():
     """Generate full presentation with preview data"""
     # Initialize progress tracker
@@ -426,9 +537,10 @@ def generate_presentation_with_preview():
         template_file = request.files.get('template')
         input_text = request.form.get('text', '').strip()
         guidance = request.form.get('guidance', '').strip()
-        api_key = request.form.get('api_key', '').strip()
+        api_key = get_api_key()
         llm_provider = request.form.get('llm_provider', 'openai').strip()
         include_speaker_notes = request.form.get('include_speaker_notes', 'false').lower() == 'true'
+        no_cache = request.form.get('no_cache', 'false').lower() == 'true'
         
         # Validate all inputs using error handler
         validate_file_upload(template_file)
@@ -438,42 +550,42 @@ def generate_presentation_with_preview():
         progress.complete_step(0)
         
         # Save uploaded template
-        template_filename = secure_filename(template_file.filename)
-        template_path = os.path.join(UPLOAD_FOLDER, template_filename)
-        template_file.save(template_path)
+        template_filename, template_path = save_template_upload(template_file)
         
         try:
-            print(f"🚀 Starting full presentation generation with preview...")
-            print(f"   Speaker notes enabled: {include_speaker_notes}")
-            
-            # Step 1: Initialize processors
-            ppt_processor = ImprovedPPTProcessor()
-            llm_integration = LLMIntegration(api_key, llm_provider)
-            
-            # Step 2: Extract raw template data
-            raw_template_data = ppt_processor.extract_raw_template_data(template_path)
-            print(f"🔍 Raw template data extracted")
-            
-            # Step 3: Generate manifest using LLM
-            manifest = llm_integration.generate_template_manifest(raw_template_data)
-            print(f"🧠 Template manifest generated with {len(manifest.get('layouts', []))} layout rules")
+            logger.info("🚀 Starting full presentation generation with preview...")
+            logger.debug("   Speaker notes enabled: %s", include_speaker_notes)
+            
+            # Step 1: Shared processors
+            ppt_processor = _PROCESSOR
+            llm_integration = get_llm_integration(api_key, llm_provider, use_prompt_cache=USE_PROMPT_CACHE)
+            
+            # Step 4 (concurrently): Structure the content using LLM
+            logger.debug("🔄 Starting content structuring with LLM...")
+            logger.debug("   Text length: %d characters", len(input_text))
+            if guidance:
+                logger.debug("   Guidance: %s...", guidance[:100])
+            else:
+                logger.debug("   No guidance provided")
+            structure_future = _LLM_EXECUTOR.submit(llm_integration.structure_text_to_slides, input_text, guidance, no_cache)
+            
+            # Step 2 & 3: Extract raw template data and generate manifest using LLM
+            # The template is parsed once and reused for extraction and generation
+            prs = Presentation(template_path)
+            raw_template_data, manifest = get_template_manifest(template_path, ppt_processor, llm_integration, prs, no_cache)
+            logger.debug("🧠 Template manifest generated with %d layout rules", len(manifest.get('layouts', [])))
             
-            # Step 4: Structure the content using LLM
             try:
-                print(f"🔄 Starting content structuring with LLM...")
-                print(f"   Text length: {len(input_text)} characters")
-                print(f"   Guidance: {guidance[:100]}..." if guidance else "   No guidance provided")
-                
-                slide_structure = llm_integration.structure_text_to_slides(input_text, guidance)
+                slide_structure = structure_future.result()
                 
                 if not slide_structure or not slide_structure.get('slides'):
                     raise ValueError("LLM returned empty or invalid slide structure")
                 
-                print(f"📋 Content structured into {len(slide_structure.get('slides', []))} slides")
+                logger.debug("📋 Content structured into %d slides", len(slide_structure.get('slides', [])))
                 
             except Exception as structure_error:
-                print(f"❌ Error during content structuring: {str(structure_error)}")
-                print(f"   Creating fallback structure...")
+                logger.warning("❌ Error during content structuring: %s", structure_error)
+                logger.warning("   Creating fallback structure...")
                 
                 # Create a simple fallback structure
                 slide_structure = {
@@ -503,18 +615,18 @@ def generate_presentation_with_preview():
                         }
                     ]
                 }
-                print(f"📋 Using fallback structure with {len(slide_structure['slides'])} slides")
+                logger.debug("📋 Using fallback structure with %d slides", len(slide_structure['slides']))
             
             # Step 5: Generate presentation using manifest
-            prs = ppt_processor.generate_presentation_with_manifest(slide_structure, template_path, manifest)
+            prs = ppt_processor.generate_presentation_with_manifest(slide_structure, prs, manifest)
             
             # Step 6: Save the presentation
-            timestamp = int(time.time())
-            output_filename = f'presentation_{timestamp}.pptx'
+            # Unique per request: concurrent requests must never share an output path
+            output_filename = f'presentation_{uuid.uuid4().hex}.pptx'
             output_path = os.path.join(UPLOAD_FOLDER, output_filename)
             prs.save(output_path)
             
-            print(f"✅ Full presentation generated successfully")
+            logger.info("✅ Full presentation generated successfully")
             
             # Step 7: Prepare preview data
             slides_data = slide_structure.get('slides', [])
@@ -546,41 +658,26 @@ def generate_presentation_with_preview():
             
         finally:
             # Cleanup uploaded template (but keep generated file for download)
-            try:
-                if os.path.exists(template_path):
-                    os.remove(template_path)
-                    print(f"🧹 Cleaned up template file: {template_path}")
-            except Exception as cleanup_error:
-                print(f"⚠️  Warning: Could not cleanup template file: {str(cleanup_error)}")
+            remove_upload(template_path)
+            logger.debug("🧹 Scheduled cleanup of template file: %s", template_path)
             
             # Force garbage collection to free memory
-            import gc
             gc.collect()
-            print(f"🧹 Memory cleanup completed")
+            logger.debug("🧹 Memory cleanup completed")
         
+    except PPTGeneratorError as e:
+        return create_error_response(e)
     except Exception as e:
-        print(f"❌ CRITICAL ERROR in presentation generation: {str(e)}")
-        print(f"   Error type: {type(e).__name__}")
-        print(traceback.format_exc())
+        logger.exception("❌ CRITICAL ERROR in presentation generation (%s): %s", type(e).__name__, e)
         
         # Force cleanup on error
-        try:
-            import gc
-            gc.collect()
-        except:
-            pass
+        gc.collect()
             
         return jsonify({'error': f'Failed to generate presentation: {str(e)}'}), 500
 
 @app.route('/api/supported-providers', methods=['GET'])
 def get_supported_providers():
-    return jsonify({
-        'providers': [
-            {'id': 'openai', 'name': 'OpenAI (GPT-4)'},
-            {'id': 'anthropic', 'name': 'Anthropic (Claude)'},
-            {'id': 'gemini', 'name': 'Google Gemini'}
-        ]
-    })
+    return Response(_PROVIDERS_BODY, mimetype='application/json')
 
 @app.errorhandler(413)
 def too_large(e):
@@ -596,8 +693,8 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     debug = os.environ.get('FLASK_ENV') != 'production'
     
-    print("🚀 Starting PPT Generator")
-    print("📋 Make sure you have your LLM API key ready!")
-    print("✨ Ready to transform your text into presentations!")
+    logger.info("🚀 Starting PPT Generator")
+    logger.info("📋 Make sure you have your LLM API key ready!")
+    logger.info("✨ Ready to transform your text into presentations!")
     
     app.run(host='0.0.0.0', port=port, debug=debug)
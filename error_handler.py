@@ -1,23 +1,57 @@
 """
 Comprehensive error handling for PPT Generator
 """
-import traceback
+import re
 import logging
-from functools import wraps
-from flask import jsonify
+import logging.handlers
+import queue
+import atexit
+import zipfile
+from array import array
+from functools import partial
+from types import MethodType, SimpleNamespace
+from flask import Response
+import orjson
 import os
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ppt_generator.log'),
-        logging.StreamHandler()
-    ]
-)
+# Request threads only enqueue records; a background listener does the file/console I/O
+_log_handlers = [
+    logging.FileHandler('ppt_generator.log'),
+    logging.StreamHandler()
+]
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_queue_handler = logging.handlers.QueueHandler(queue.Queue(-1))
+# Records are formatted once, by the listener's handlers
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+_log_listener = None
+
+def _start_log_listener():
+    """Start a listener thread that drains the log queue into the real handlers"""
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(
+        _queue_handler.queue, *_log_handlers, respect_handler_level=True
+    )
+    _log_listener.start()
+
+def _restart_log_listener_in_child():
+    """Threads don't survive fork (gunicorn --preload), so give each worker its own queue and listener"""
+    _queue_handler.queue = queue.Queue(-1)
+    _start_log_listener()
+
+logging.root.addHandler(_queue_handler)
+logging.root.setLevel(logging.INFO)
+_start_log_listener()
+atexit.register(lambda: _log_listener.stop())
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_log_listener_in_child)
 
 logger = logging.getLogger(__name__)
+# Debug-level progress output is only emitted outside production
+logger.setLevel(logging.INFO if os.environ.get('FLASK_ENV') == 'production' else logging.DEBUG)
 
 class PPTGeneratorError(Exception):
     """Base exception for PPT Generator"""
@@ -48,246 +82,361 @@ MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 MAX_TEXT_LENGTH = 100000  # 100K characters
 MIN_TEXT_LENGTH = 100     # 100 characters
 
+# Accepted template extensions (without the dot), shared with app.allowed_file
+ALLOWED_EXTENSIONS = frozenset({'pptx', 'potx'})
+
+# Error codes with their user-facing messages; %-templates are filled in at raise time
+class E:
+    NO_FILE = ("NO_FILE", "Please select a PowerPoint template file")
+    NO_FILENAME = ("NO_FILENAME", "The selected file appears to be invalid")
+    INVALID_EXTENSION = ("INVALID_EXTENSION", "Please upload a PowerPoint file (.pptx or .potx). You uploaded: %s")
+    FILE_TOO_LARGE = ("FILE_TOO_LARGE", "File size (%.1fMB) exceeds the maximum limit of %dMB")
+    INVALID_TEMPLATE = ("INVALID_TEMPLATE", "The uploaded file is not a valid PowerPoint template (.pptx or .potx)")
+    EMPTY_TEXT = ("EMPTY_TEXT", "Please provide text content to convert into slides")
+    TEXT_TOO_SHORT = ("TEXT_TOO_SHORT", "Please provide at least %d characters of text (current: %d)")
+    TEXT_TOO_LONG = ("TEXT_TOO_LONG", "Text exceeds maximum length of %s characters (current: %s)")
+    MISSING_API_KEY = ("MISSING_API_KEY", "Please provide a valid %s API key")
+    INVALID_OPENAI_KEY = ("INVALID_API_KEY_FORMAT", "OpenAI API keys should start with 'sk-'. Please check your API key.")
+    INVALID_ANTHROPIC_KEY = ("INVALID_API_KEY_FORMAT", "Anthropic API keys should start with 'sk-ant-'. Please check your API key.")
+    INVALID_GEMINI_KEY = ("INVALID_API_KEY_FORMAT", "Gemini API key appears to be too short. Please check your API key.")
+
 def validate_file_upload(file):
     """Validate uploaded file"""
     if not file:
-        raise FileValidationError(
-            "No file provided",
-            error_code="NO_FILE",
-            user_message="Please select a PowerPoint template file"
-        )
+        raise FileValidationError("No file provided", *E.NO_FILE)
     
     if not file.filename:
-        raise FileValidationError(
-            "No filename provided",
-            error_code="NO_FILENAME", 
-            user_message="The selected file appears to be invalid"
-        )
+        raise FileValidationError("No filename provided", *E.NO_FILENAME)
     
     # Check file extension
-    allowed_extensions = {'.pptx', '.potx'}
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in allowed_extensions:
-        raise FileValidationError(
-            f"Invalid file extension: {file_ext}",
-            error_code="INVALID_EXTENSION",
-            user_message=f"Please upload a PowerPoint file (.pptx or .potx). You uploaded: {file_ext}"
-        )
+    filename = file.filename
+    dot = filename.rfind('.')
+    ext = filename[dot + 1:].lower() if dot >= 0 else ''
+    if ext not in ALLOWED_EXTENSIONS:
+        file_ext = f'.{ext}' if dot >= 0 else ''
+        error_code, user_message = E.INVALID_EXTENSION
+        raise FileValidationError(f"Invalid file extension: {file_ext}", error_code, user_message % file_ext)
     
     # Check file size if available
     if hasattr(file, 'content_length') and file.content_length:
         if file.content_length > MAX_FILE_SIZE:
             size_mb = file.content_length / (1024 * 1024)
+            error_code, user_message = E.FILE_TOO_LARGE
             raise FileValidationError(
-                f"File too large: {size_mb:.1f}MB",
-                error_code="FILE_TOO_LARGE",
-                user_message=f"File size ({size_mb:.1f}MB) exceeds the maximum limit of {MAX_FILE_SIZE/(1024*1024):.0f}MB"
+                "File too large: %.1fMB" % size_mb,
+                error_code,
+                user_message % (size_mb, MAX_FILE_SIZE // (1024 * 1024))
             )
 
+def validate_template_package(path):
+    """Check a saved upload is a real PowerPoint package before python-pptx parses it"""
+    with open(path, 'rb') as f:
+        is_zip = f.read(4) == b'PK\x03\x04'
+    try:
+        if is_zip:
+            with zipfile.ZipFile(path) as package:
+                # Reads only the central directory; no part is decompressed
+                package.getinfo('ppt/presentation.xml')
+            return
+    except (zipfile.BadZipFile, KeyError):
+        pass
+    raise FileValidationError(f"Not a PowerPoint package: {path}", *E.INVALID_TEMPLATE)
+
 def validate_text_input(text):
     """Validate text input"""
-    if not text or not text.strip():
-        raise FileValidationError(
-            "Empty text input",
-            error_code="EMPTY_TEXT",
-            user_message="Please provide text content to convert into slides"
-        )
+    if not text:
+        raise FileValidationError("Empty text input", *E.EMPTY_TEXT)
     
-    text_length = len(text.strip())
+    # Unpadded text (the usual case) has the same length stripped, so skip copying it
+    if text[0].isspace() or text[-1].isspace():
+        text = text.strip()
+        if not text:
+            raise FileValidationError("Empty text input", *E.EMPTY_TEXT)
+    
+    text_length = len(text)
     if text_length < MIN_TEXT_LENGTH:
+        error_code, user_message = E.TEXT_TOO_SHORT
         raise FileValidationError(
-            f"Text too short: {text_length} characters",
-            error_code="TEXT_TOO_SHORT",
-            user_message=f"Please provide at least {MIN_TEXT_LENGTH} characters of text (current: {text_length})"
+            "Text too short: %d characters" % text_length,
+            error_code,
+            user_message % (MIN_TEXT_LENGTH, text_length)
         )
     
     if text_length > MAX_TEXT_LENGTH:
+        error_code, user_message = E.TEXT_TOO_LONG
         raise FileValidationError(
-            f"Text too long: {text_length} characters",
-            error_code="TEXT_TOO_LONG",
-            user_message=f"Text exceeds maximum length of {MAX_TEXT_LENGTH:,} characters (current: {text_length:,})"
+            "Text too long: %d characters" % text_length,
+            error_code,
+            user_message % (f"{MAX_TEXT_LENGTH:,}", f"{text_length:,}")
         )
 
+# provider -> (key pattern, log message, E entry); patterns match from the start of the key and
+# check only what the E messages tell the user: the prefix, or the minimum length for Gemini
+_API_KEY_FORMATS = {
+    'openai': (re.compile(r'sk-'), "Invalid OpenAI API key format", E.INVALID_OPENAI_KEY),
+    'anthropic': (re.compile(r'sk-ant-'), "Invalid Anthropic API key format", E.INVALID_ANTHROPIC_KEY),
+    # Gemini keys are typically longer
+    'gemini': (re.compile(r'.{30}', re.DOTALL), "Invalid Gemini API key format", E.INVALID_GEMINI_KEY),
+}
+
 def validate_api_key(api_key, provider):
     """Validate API key"""
     if not api_key or not api_key.strip():
-        raise APIError(
-            "Missing API key",
-            error_code="MISSING_API_KEY",
-            user_message=f"Please provide a valid {provider.upper()} API key"
-        )
+        error_code, user_message = E.MISSING_API_KEY
+        raise APIError("Missing API key", error_code, user_message % provider.upper())
     
     # Basic format validation for different providers
     api_key = api_key.strip()
     
-    if provider == 'openai':
-        if not api_key.startswith('sk-'):
-            raise APIError(
-                "Invalid OpenAI API key format",
-                error_code="INVALID_API_KEY_FORMAT",
-                user_message="OpenAI API keys should start with 'sk-'. Please check your API key."
-            )
-    elif provider == 'anthropic':
-        if not api_key.startswith('sk-ant-'):
-            raise APIError(
-                "Invalid Anthropic API key format", 
-                error_code="INVALID_API_KEY_FORMAT",
-                user_message="Anthropic API keys should start with 'sk-ant-'. Please check your API key."
-            )
-    elif provider == 'gemini':
-        if len(api_key) < 30:  # Gemini keys are typically longer
-            raise APIError(
-                "Invalid Gemini API key format",
-                error_code="INVALID_API_KEY_FORMAT", 
-                user_message="Gemini API key appears to be too short. Please check your API key."
-            )
+    key_format = _API_KEY_FORMATS.get(provider)
+    if key_format is not None:
+        pattern, message, error = key_format
+        if not pattern.match(api_key):
+            raise APIError(message, *error)
 
-def handle_llm_errors(func):
-    """Decorator to handle LLM-related errors"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
+def _compile_classifier(categories):
+    """
+    Build one case-insensitive regex over (name, phrases) pairs; match.lastgroup names the category
+    Categories are tried in order, so an earlier category wins wherever its phrase appears in the message
+    """
+    branches = '|'.join(
+        f"(?=.*?(?:{'|'.join(map(re.escape, phrases))}))(?P<{name}>)" for name, phrases in categories
+    )
+    return re.compile(f"^(?:{branches})", re.IGNORECASE | re.DOTALL)
+
+# Error classifiers: one precompiled pattern per decorator instead of repeated substring scans
+_LLM_ERROR_PATTERN = _compile_classifier([
+    ('auth', ['api key', 'unauthorized', 'authentication', 'invalid key']),
+    ('rate', ['rate limit', 'quota', 'too many requests']),
+    ('network', ['connection', 'network', 'timeout', 'unreachable']),
+])
+
+# category -> (error_code, developer message format, user_message)
+_LLM_ERRORS = {
+    'auth': (
+        "AUTH_FAILED",
+        "API authentication failed: %s",
+        "API key authentication failed. Please check your API key and try again."
+    ),
+    'rate': (
+        "RATE_LIMITED",
+        "Rate limit exceeded: %s",
+        "API rate limit exceeded. Please wait a moment and try again."
+    ),
+    'network': (
+        "NETWORK_ERROR",
+        "Network error: %s",
+        "Unable to connect to the AI service. Please check your internet connection and try again."
+    ),
+    None: (
+        "LLM_FAILED",
+        "LLM processing failed: %s",
+        "AI processing failed. Please try again with different content or API key."
+    ),
+}
+
+_TEMPLATE_ERROR_PATTERN = _compile_classifier([
+    ('corrupt', ['corrupt', 'invalid format', 'not a valid', 'damaged']),
+    ('access', ['permission', 'access denied', 'forbidden']),
+])
+
+_TEMPLATE_ERRORS = {
+    'corrupt': (
+        "CORRUPT_TEMPLATE",
+        "Template file corruption: %s",
+        "The template file appears to be corrupted or invalid. Please try a different PowerPoint file."
+    ),
+    'access': (
+        "ACCESS_DENIED",
+        "File access error: %s",
+        "Unable to access the template file. Please check file permissions."
+    ),
+    None: (
+        "TEMPLATE_FAILED",
+        "Template processing failed: %s",
+        "Unable to process the template file. Please try a different PowerPoint template."
+    ),
+}
+
+def _classify_error(pattern, error):
+    """Return the category of error's message under a _compile_classifier pattern, or None"""
+    match = pattern.match(str(error))
+    return match.lastgroup if match else None
+
+# Typed exceptions raised by the openai/anthropic SDKs, classified without scanning the message
+_LLM_ERROR_TYPES = {
+    'AuthenticationError': 'auth',
+    'RateLimitError': 'rate',
+    'APIConnectionError': 'network',
+    'APITimeoutError': 'network',
+}
+
+# kind -> (exception class, classifier pattern, category table, exception type name -> category)
+_ERROR_KINDS = {
+    'llm': (LLMError, _LLM_ERROR_PATTERN, _LLM_ERRORS, _LLM_ERROR_TYPES),
+    'template': (TemplateError, _TEMPLATE_ERROR_PATTERN, _TEMPLATE_ERRORS, {}),
+}
+
+def classify_error(kind, error):
+    """Wrap an arbitrary exception as the LLMError/TemplateError ('llm'/'template' kind) its message matches"""
+    error_class, pattern, categories, type_categories = _ERROR_KINDS[kind]
+    category = type_categories.get(type(error).__name__)
+    if category is None:
+        category = _classify_error(pattern, error)
+    error_code, message_format, user_message = categories[category]
+    return error_class(message_format % error, error_code, user_message)
+
+# Wraps func so any exception it raises is passed to on_error; binds to instances like a function.
+# __doc__ is a slot, so the description lives in this comment rather than a class docstring.
+class _GuardedCall:
+    __slots__ = ('_func', '_on_error', '__name__', '__qualname__', '__doc__', '__wrapped__')
+    
+    def __init__(self, func, on_error):
+        self._func = func
+        self._on_error = on_error
+        self.__name__ = func.__name__
+        self.__qualname__ = func.__qualname__
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+    
+    def __call__(self, *args, **kwargs):
         try:
-            return func(*args, **kwargs)
+            return self._func(*args, **kwargs)
         except Exception as e:
-            error_message = str(e).lower()
-            
-            # API key errors
-            if any(phrase in error_message for phrase in ['api key', 'unauthorized', 'authentication', 'invalid key']):
-                raise LLMError(
-                    f"API authentication failed: {str(e)}",
-                    error_code="AUTH_FAILED",
-                    user_message="API key authentication failed. Please check your API key and try again."
-                )
-            
-            # Rate limiting
-            elif any(phrase in error_message for phrase in ['rate limit', 'quota', 'too many requests']):
-                raise LLMError(
-                    f"Rate limit exceeded: {str(e)}",
-                    error_code="RATE_LIMITED",
-                    user_message="API rate limit exceeded. Please wait a moment and try again."
-                )
-            
-            # Network/connection errors
-            elif any(phrase in error_message for phrase in ['connection', 'network', 'timeout', 'unreachable']):
-                raise LLMError(
-                    f"Network error: {str(e)}",
-                    error_code="NETWORK_ERROR",
-                    user_message="Unable to connect to the AI service. Please check your internet connection and try again."
-                )
-            
-            # Generic LLM error
-            else:
-                raise LLMError(
-                    f"LLM processing failed: {str(e)}",
-                    error_code="LLM_FAILED",
-                    user_message="AI processing failed. Please try again with different content or API key."
-                )
+            return self._on_error(e)
     
-    return wrapper
+    def __get__(self, instance, owner=None):
+        return self if instance is None else MethodType(self, instance)
+
+def _raise_llm_error(error):
+    raise classify_error('llm', error)
+
+def _raise_template_error(error):
+    raise classify_error('template', error)
+
+def handle_llm_errors(func):
+    """Decorator to handle LLM-related errors"""
+    return _GuardedCall(func, _raise_llm_error)
 
 def handle_template_errors(func):
     """Decorator to handle template processing errors"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            error_message = str(e).lower()
-            
-            # File corruption
-            if any(phrase in error_message for phrase in ['corrupt', 'invalid format', 'not a valid', 'damaged']):
-                raise TemplateError(
-                    f"Template file corruption: {str(e)}",
-                    error_code="CORRUPT_TEMPLATE",
-                    user_message="The template file appears to be corrupted or invalid. Please try a different PowerPoint file."
-                )
-            
-            # Permissions
-            elif any(phrase in error_message for phrase in ['permission', 'access denied', 'forbidden']):
-                raise TemplateError(
-                    f"File access error: {str(e)}",
-                    error_code="ACCESS_DENIED",
-                    user_message="Unable to access the template file. Please check file permissions."
-                )
-            
-            # Generic template error
-            else:
-                raise TemplateError(
-                    f"Template processing failed: {str(e)}",
-                    error_code="TEMPLATE_FAILED",
-                    user_message="Unable to process the template file. Please try a different PowerPoint template."
-                )
+    return _GuardedCall(func, _raise_template_error)
+
+def _error_body(error_code, user_message):
+    return orjson.dumps({'error': user_message, 'error_code': error_code, 'success': False})
+
+def _precompute_error_bodies():
+    """Serialize the validation errors whose messages never vary, by provoking each one once"""
+    probes = [
+        partial(validate_file_upload, None),
+        partial(validate_file_upload, SimpleNamespace(filename='')),
+        partial(validate_text_input, ''),
+    ]
+    for provider in ('openai', 'anthropic', 'gemini'):
+        probes.append(partial(validate_api_key, '', provider))
+        probes.append(partial(validate_api_key, 'x', provider))
     
-    return wrapper
+    bodies = {}
+    for probe in probes:
+        try:
+            probe()
+        except PPTGeneratorError as e:
+            bodies[(e.error_code, e.user_message)] = _error_body(e.error_code, e.user_message)
+    return bodies
+
+# (error_code, user_message) -> serialized response body for the stock validation errors
+_STATIC_ERROR_BODIES = _precompute_error_bodies()
+# error_code -> (user_message, serialized body) for the last message seen with that code
+_RECENT_ERROR_BODIES = {}
+_INTERNAL_ERROR_BODY = _error_body('INTERNAL_ERROR', 'An unexpected error occurred. Please try again.')
 
 def create_error_response(error):
     """Create standardized error response"""
     if isinstance(error, PPTGeneratorError):
-        logger.error(f"PPT Generator Error: {error.error_code} - {error.message}")
-        return jsonify({
-            'error': error.user_message,
-            'error_code': error.error_code,
-            'success': False
-        }), 400
+        logger.error("PPT Generator Error: %s - %s", error.error_code, error.message, extra={'error_code': error.error_code})
+        body = _STATIC_ERROR_BODIES.get((error.error_code, error.user_message))
+        if body is None:
+            # Repeats of the latest message for this code reuse its encoded body
+            cached_message, body = _RECENT_ERROR_BODIES.get(error.error_code, (None, None))
+            if cached_message != error.user_message:
+                body = _error_body(error.error_code, error.user_message)
+                _RECENT_ERROR_BODIES[error.error_code] = (error.user_message, body)
+        return Response(body, mimetype='application/json'), 400
     else:
-        # Log full traceback for unexpected errors
-        logger.error(f"Unexpected error: {str(error)}\n{traceback.format_exc()}")
-        return jsonify({
-            'error': 'An unexpected error occurred. Please try again.',
-            'error_code': 'INTERNAL_ERROR',
-            'success': False
-        }), 500
-
-def safe_api_call(func):
-    """Decorator for safe API calls with comprehensive error handling"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except PPTGeneratorError as e:
-            return create_error_response(e)
-        except Exception as e:
-            return create_error_response(e)
+        # Log full traceback for unexpected errors; formatted by the handler, only if emitted
+        logger.exception("Unexpected error: %s", error, extra={'error_code': 'INTERNAL_ERROR'})
+        return Response(_INTERNAL_ERROR_BODY, mimetype='application/json'), 500
+
+def robust_api_call(kind=None):
+    """
+    Decorator for API endpoints: a single try/except that turns any failure into an error response
+    With kind='llm' or 'template', unexpected exceptions are classified as in handle_llm_errors/handle_template_errors
+    """
+    def on_error(error):
+        if kind and not isinstance(error, PPTGeneratorError):
+            error = classify_error(kind, error)
+        return create_error_response(error)
     
-    return wrapper
+    return lambda func: _GuardedCall(func, on_error)
+
+# Decorator for safe API calls with comprehensive error handling
+safe_api_call = robust_api_call()
 
 # Progress tracking utilities
+_STATUS_PENDING, _STATUS_IN_PROGRESS, _STATUS_COMPLETED, _STATUS_FAILED = 0, 1, 2, 3
+_STATUS_NAMES = ('pending', 'in_progress', 'completed', 'failed')
+
 class ProgressTracker:
     def __init__(self):
-        self.steps = []
+        # One parallel sequence per step field; statuses are packed one byte per step
+        self._names = []
+        self._descriptions = []
+        self._statuses = array('B')
+        self._errors = []
         self.current_step = 0
+        # Kept in step with every status change so get_status doesn't rescan the statuses
+        self._completed = 0
+    
+    @property
+    def steps(self):
+        """Per-step dicts, built on demand"""
+        return [
+            {'name': name, 'description': description, 'status': _STATUS_NAMES[status], 'error': error}
+            for name, description, status, error in zip(self._names, self._descriptions, self._statuses, self._errors)
+        ]
         
     def add_step(self, name, description):
-        self.steps.append({
-            'name': name,
-            'description': description,
-            'status': 'pending',
-            'error': None
-        })
+        self._names.append(name)
+        self._descriptions.append(description)
+        self._statuses.append(_STATUS_PENDING)
+        self._errors.append(None)
+    
+    def _set_status(self, step_index, status):
+        self._completed += (status == _STATUS_COMPLETED) - (self._statuses[step_index] == _STATUS_COMPLETED)
+        self._statuses[step_index] = status
     
     def start_step(self, step_index):
-        if 0 <= step_index < len(self.steps):
+        if 0 <= step_index < len(self._names):
             self.current_step = step_index
-            self.steps[step_index]['status'] = 'in_progress'
-            logger.info(f"Started step {step_index + 1}/{len(self.steps)}: {self.steps[step_index]['name']}")
+            self._set_status(step_index, _STATUS_IN_PROGRESS)
+            logger.info("Started step %d/%d: %s", step_index + 1, len(self._names), self._names[step_index])
     
     def complete_step(self, step_index):
-        if 0 <= step_index < len(self.steps):
-            self.steps[step_index]['status'] = 'completed'
-            logger.info(f"Completed step {step_index + 1}/{len(self.steps)}: {self.steps[step_index]['name']}")
+        if 0 <= step_index < len(self._names):
+            self._set_status(step_index, _STATUS_COMPLETED)
+            logger.info("Completed step %d/%d: %s", step_index + 1, len(self._names), self._names[step_index])
     
     def fail_step(self, step_index, error_message):
-        if 0 <= step_index < len(self.steps):
-            self.steps[step_index]['status'] = 'failed'
-            self.steps[step_index]['error'] = error_message
-            logger.error(f"Failed step {step_index + 1}/{len(self.steps)}: {self.steps[step_index]['name']} - {error_message}")
+        if 0 <= step_index < len(self._names):
+            self._set_status(step_index, _STATUS_FAILED)
+            self._errors[step_index] = error_message
+            logger.error("Failed step %d/%d: %s - %s", step_index + 1, len(self._names), self._names[step_index], error_message)
     
     def get_status(self):
-        completed = sum(1 for step in self.steps if step['status'] == 'completed')
-        total = len(self.steps)
+        total = len(self._names)
         return {
             'current_step': self.current_step + 1,
             'total_steps': total,
-            'progress_percentage': (completed / total * 100) if total > 0 else 0,
+            'progress_percentage': (self._completed / total * 100) if total > 0 else 0,
             'steps': self.steps
         }
@@ -5,21 +5,20 @@ Fix OpenAI client by clearing all proxy configurations
 
 import os
 
+PROXY_VARS = frozenset({
+    'http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY',
+    'ftp_proxy', 'FTP_PROXY', 'no_proxy', 'NO_PROXY',
+    'all_proxy', 'ALL_PROXY', 'PROXY', 'proxy'
+})
+
 def clear_all_proxy_vars():
     """Clear all possible proxy environment variables"""
     print("🧹 Clearing all proxy environment variables...")
     
-    proxy_vars = [
-        'http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY',
-        'ftp_proxy', 'FTP_PROXY', 'no_proxy', 'NO_PROXY',
-        'all_proxy', 'ALL_PROXY', 'PROXY', 'proxy'
-    ]
-    
-    cleared = []
-    for var in proxy_vars:
-        if var in os.environ:
-            cleared.append(var)
-            del os.environ[var]
+    # One set intersection finds every proxy variable that's actually set
+    cleared = sorted(PROXY_VARS & os.environ.keys())
+    for var in cleared:
+        os.environ.pop(var, None)
     
     if cleared:
         print(f"Cleared: {cleared}")
@@ -4,253 +4,436 @@ Improved PPT Processor that better preserves template styling
 """
 
 from pptx import Presentation
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.slide import NotesSlidePart
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+from pptx.enum.dml import MSO_COLOR_TYPE, MSO_FILL
+from pptx.shapes.autoshape import Shape
 import os
+import re
+import shutil
+import copy
+import logging
 import tempfile
-import json
-from PIL import Image
 import io
+import uuid
+import zipfile
+from lxml import etree
+from functools import lru_cache
+from cache_handler import LRUCache
+from error_handler import logger
+
+def _template_cache_key(template):
+    """Key results for a template file on its path and modification state, or None for loaded Presentations"""
+    if not isinstance(template, (str, os.PathLike)):
+        return None
+    stat = os.stat(template)
+    return (os.path.abspath(template), stat.st_mtime_ns, stat.st_size)
+
+# Raw-data names for theme color scheme slots, by slot index
+THEME_COLOR_NAMES = (
+    "bg1", "text1", "bg2", "text2",
+    "accent1", "accent2", "accent3", "accent4", "accent5", "accent6",
+    "theme_color_10", "theme_color_11"
+)
+
+# Generated text is forced to black for readability, whatever the template colors
+_BLACK = RGBColor(0, 0, 0)
+
+# XML-illegal control characters, escaped the same way python-pptx escapes run text
+_CTRL_CHARS = re.compile(r"[\x00-\x08\x0B-\x1F]")
+
+# Asset ids assigned by extract_raw_template_data: img_<template slide index>_<shape index>
+_ASSET_ID = re.compile(r'img_(\d+)_(\d+)\Z')
+
+# Manifest archetypes usable for section slides and slides without body content
+_SECTION_ARCHETYPES = frozenset({'section_header', 'title_only'})
+
+@lru_cache(maxsize=256)
+def _rgb_hex(rgb):
+    """Format an RGBColor (a 3-tuple of ints) as '#rrggbb'; templates reuse few distinct colors"""
+    return '#%02x%02x%02x' % tuple(rgb)
+
+@lru_cache(maxsize=16)
+def _read_template_part(source_key, partname):
+    """Read one package part straight from the template zip named by a _template_cache_key"""
+    with zipfile.ZipFile(source_key[0]) as package:
+        return package.read(partname.lstrip('/'))
 
 class ImprovedPPTProcessor:
     def __init__(self):
-        self.temp_dir = tempfile.mkdtemp()
+        self._temp_dir = None
+        # (path, mtime_ns, size) -> (analysis, raw_data), so repeat passes skip the zip + XML parse
+        self._template_cache = LRUCache(maxsize=8)
+    
+    @property
+    def temp_dir(self):
+        """Scratch directory for saved presentations, created on first use"""
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp()
+        return self._temp_dir
     
     def analyze_template(self, template_path):
         """Enhanced template analysis that extracts more styling information"""
         try:
-            prs = Presentation(template_path)
-            analysis = {
-                'layouts': [],
-                'colors': [],
-                'fonts': [],
-                'images': [],
-                'backgrounds': [],
-                'slide_dimensions': {
-                    'width': prs.slide_width,
-                    'height': prs.slide_height
-                },
-                'master_slides': [],
-                'theme_colors': []
-            }
+            analysis, _ = self._walk_template_cached(template_path)
             
-            print(f"🔍 Analyzing template with {len(prs.slides)} slides, {len(prs.slide_layouts)} layouts")
+            logger.info(
+                "✅ Template analysis complete: %d colors, %d theme colors, %d fonts, %d images",
+                len(analysis['colors']), len(analysis['theme_colors']), len(analysis['fonts']), len(analysis['images'])
+            )
             
-            # Analyze slide layouts with more detail
-            for i, layout in enumerate(prs.slide_layouts):
-                layout_info = {
-                    'index': i,
-                    'name': layout.name,
-                    'placeholders': [],
-                    'background': None
-                }
-                
-                # Analyze placeholders
-                for placeholder in layout.placeholders:
-                    try:
-                        placeholder_info = {
-                            'index': placeholder.placeholder_format.idx,
-                            'type': str(placeholder.placeholder_format.type),
-                            'name': placeholder.name,
-                            'left': placeholder.left,
-                            'top': placeholder.top,
-                            'width': placeholder.width,
-                            'height': placeholder.height
-                        }
-                        layout_info['placeholders'].append(placeholder_info)
-                    except:
-                        pass
-                
-                # Check layout background
-                try:
-                    if layout.background.fill.type:
-                        layout_info['background'] = str(layout.background.fill.type)
-                except:
-                    pass
-                
-                analysis['layouts'].append(layout_info)
-            
-            # Analyze master slides and themes
-            for i, master in enumerate(prs.slide_masters):
-                master_info = {
-                    'name': master.name,
-                    'colors': [],
-                    'fonts': [],
-                    'background': None
-                }
-                
-                # Extract theme colors more thoroughly
+            return analysis
+            
+        except Exception as e:
+            logger.exception("❌ Error analyzing template: %s", e)
+            return self._get_default_analysis()
+    
+    def _walk_template_cached(self, template):
+        """Return (analysis, raw_data) for template, walking each template file version only once"""
+        cache_key = _template_cache_key(template)
+        cached = self._template_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return cached
+        
+        result = self._walk_template(self._load_presentation(template), cache_key)
+        if cache_key:
+            self._template_cache.set(cache_key, result)
+        return result
+    
+    def _walk_template(self, prs, source_key=None):
+        """
+        Single traversal of layouts, masters and slides that builds both the styling analysis
+        and the raw LLM metadata, so each shape and run is visited once
+        source_key identifies the template file, letting image entries reference parts instead of holding bytes
+        """
+        analysis = {
+            'layouts': [],
+            'colors': [],
+            'fonts': [],
+            'images': [],
+            # partname -> bytes for templates analyzed from a loaded Presentation, one entry per distinct image
+            'image_blobs': {},
+            'backgrounds': [],
+            'slide_dimensions': {
+                'width': prs.slide_width,
+                'height': prs.slide_height
+            },
+            'master_slides': [],
+            'theme_colors': [],
+            # Insertion-ordered dedup accumulators, materialized as lists once the walk finishes
+            '_colors': {},
+            '_fonts_by_name': {},
+            '_theme_colors': {}
+        }
+        raw_data = {
+            "slide_size": {
+                "width_emu": int(prs.slide_width),
+                "height_emu": int(prs.slide_height)
+            },
+            "theme": {
+                "colors": {},
+                "fonts": {}
+            },
+            "layouts": [],
+            "images": []
+        }
+        
+        logger.info("🔍 Analyzing template with %d slides, %d layouts", len(prs.slides), len(prs.slide_layouts))
+        
+        # Analyze slide layouts with more detail
+        for i, layout in enumerate(prs.slide_layouts):
+            layout_info = {
+                'index': i,
+                'name': layout.name,
+                'placeholders': [],
+                'background': None
+            }
+            layout_data = {
+                "index": i,
+                "name": layout.name,
+                "placeholders": []
+            }
+            
+            # Analyze placeholders
+            for placeholder in layout.placeholders:
                 try:
-                    theme = master.theme
-                    if theme and theme.color_scheme:
-                        for j in range(12):
-                            try:
-                                color = theme.color_scheme[j]
-                                if color and hasattr(color, 'rgb'):
-                                    color_hex = f"#{color.rgb:06x}"
-                                    master_info['colors'].append(color_hex)
-                                    if color_hex not in analysis['theme_colors']:
-                                        analysis['theme_colors'].append(color_hex)
-                            except:
-                                pass
-                except:
+                    placeholder_format = placeholder.placeholder_format
+                    placeholder_type = str(placeholder_format.type)
+                    left, top = placeholder.left, placeholder.top
+                    width, height = placeholder.width, placeholder.height
+                    layout_info['placeholders'].append({
+                        'index': placeholder_format.idx,
+                        'type': placeholder_type,
+                        'name': placeholder.name,
+                        'left': left,
+                        'top': top,
+                        'width': width,
+                        'height': height
+                    })
+                    layout_data["placeholders"].append({
+                        "kind": placeholder_type.split('.')[-1],  # Get enum name
+                        "left": int(left),
+                        "top": int(top),
+                        "width": int(width),
+                        "height": int(height)
+                    })
+                except (AttributeError, TypeError, ValueError):
+                    # Placeholders without their own geometry or format (inherited) are skipped
                     pass
-                
-                # Extract fonts from master
-                for shape in master.shapes:
-                    if hasattr(shape, 'text_frame'):
-                        self._extract_text_styles(shape, analysis)
-                
-                analysis['master_slides'].append(master_info)
             
-            # Analyze existing slides for actual styling
-            for slide_idx, slide in enumerate(prs.slides):
-                print(f"   Analyzing slide {slide_idx + 1}")
-                self._extract_slide_styles_enhanced(slide, analysis)
+            # Check layout background
+            try:
+                if layout.background.fill.type:
+                    layout_info['background'] = str(layout.background.fill.type)
+            except (AttributeError, TypeError, NotImplementedError):
+                pass
+            
+            analysis['layouts'].append(layout_info)
+            raw_data["layouts"].append(layout_data)
+        
+        # Analyze master slides and themes
+        for i, master in enumerate(prs.slide_masters):
+            master_info = {
+                'name': master.name,
+                'colors': [],
+                'fonts': [],
+                'background': None
+            }
             
-            print(f"✅ Template analysis complete:")
-            print(f"   - Colors found: {len(analysis['colors'])}")
-            print(f"   - Theme colors: {len(analysis['theme_colors'])}")
-            print(f"   - Fonts found: {len(analysis['fonts'])}")
-            print(f"   - Images found: {len(analysis['images'])}")
+            # Extract theme colors more thoroughly
+            # Not every python-pptx version exposes master.theme; a missing theme is the common case,
+            # so check for it rather than raising and swallowing an exception per master
+            try:
+                theme = getattr(master, 'theme', None)
+                if theme and theme.color_scheme:
+                    # zip() stops after the 12 named scheme slots
+                    for color_name, color in zip(THEME_COLOR_NAMES, theme.color_scheme):
+                        if color is None or getattr(color, 'rgb', None) is None:
+                            continue
+                        try:
+                            color_hex = _rgb_hex(color.rgb)
+                        except (TypeError, ValueError):
+                            continue
+                        master_info['colors'].append(color_hex)
+                        analysis['_theme_colors'][color_hex] = None
+                        raw_data["theme"]["colors"][color_name] = color_hex
+                
+                # Extract font scheme
+                if theme and theme.font_scheme:
+                    font_scheme = theme.font_scheme
+                    if hasattr(font_scheme, 'major_font') and font_scheme.major_font:
+                        raw_data["theme"]["fonts"]["major"] = font_scheme.major_font.latin
+                    if hasattr(font_scheme, 'minor_font') and font_scheme.minor_font:
+                        raw_data["theme"]["fonts"]["minor"] = font_scheme.minor_font.latin
+            except (AttributeError, KeyError, IndexError):
+                pass
             
-            return analysis
+            # Extract fonts from master
+            for shape in master.shapes:
+                self._extract_text_styles(shape, analysis)
             
-        except Exception as e:
-            print(f"❌ Error analyzing template: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return self._get_default_analysis()
+            analysis['master_slides'].append(master_info)
+        
+        # Analyze existing slides for actual styling and images
+        for slide_idx, slide in enumerate(prs.slides):
+            logger.debug("Analyzing slide %d", slide_idx + 1)
+            self._extract_slide_styles_enhanced(slide, slide_idx, analysis, raw_data, source_key)
+        
+        analysis['colors'] = list(analysis.pop('_colors'))
+        analysis['fonts'] = list(analysis.pop('_fonts_by_name').values())
+        analysis['theme_colors'] = list(analysis.pop('_theme_colors'))
+        self._index_template_choices(analysis)
+        return analysis, raw_data
     
     def _extract_text_styles(self, shape, analysis):
         """Extract text styling information from a shape"""
         try:
-            if not hasattr(shape, 'text_frame'):
+            if not shape.has_text_frame:
                 return
             
+            fonts_by_name = analysis['_fonts_by_name']
+            colors = analysis['_colors']
             for paragraph in shape.text_frame.paragraphs:
                 for run in paragraph.runs:
-                    # Extract font information
-                    if run.font.name:
-                        font_info = {
-                            'name': run.font.name,
+                    # Extract font information, keeping the first occurrence of each font name
+                    font_name = run.font.name
+                    if font_name and font_name not in fonts_by_name:
+                        fonts_by_name[font_name] = {
+                            'name': font_name,
                             'size': run.font.size.pt if run.font.size else 18,
                             'bold': run.font.bold or False,
                             'italic': run.font.italic or False
                         }
-                        
-                        # Avoid duplicates
-                        if not any(f['name'] == font_info['name'] for f in analysis['fonts']):
-                            analysis['fonts'].append(font_info)
                     
-                    # Extract color information
-                    try:
-                        if run.font.color.rgb:
-                            color_hex = f"#{run.font.color.rgb:06x}"
-                            if color_hex not in analysis['colors']:
-                                analysis['colors'].append(color_hex)
-                    except:
-                        pass
-        except:
+                    # Extract color information; only explicit RGB colors have an .rgb value,
+                    # so check the type instead of letting theme/unset colors raise
+                    color = run.font.color
+                    if color.type == MSO_COLOR_TYPE.RGB:
+                        colors[_rgb_hex(color.rgb)] = None
+        except (AttributeError, KeyError, IndexError, ValueError):
             pass
     
-    def _extract_slide_styles_enhanced(self, slide, analysis):
-        """Enhanced slide style extraction"""
-        for shape in slide.shapes:
+    def _extract_slide_styles_enhanced(self, slide, slide_idx, analysis, raw_data, source_key=None):
+        """Enhanced slide style extraction, also collecting raw image metadata"""
+        for shape_idx, shape in enumerate(slide.shapes):
             # Extract text styles
             self._extract_text_styles(shape, analysis)
             
             # Extract images with better error handling
             if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
                 try:
-                    image_data = {
+                    # Read the image part directly; shape.image would also hash and parse the blob
+                    image_part = shape.part.related_part(shape._element.blip_rId)
+                    partname = str(image_part.partname)
+                    blob = image_part.blob
+                    image_info = {
                         'left': shape.left,
                         'top': shape.top,
                         'width': shape.width,
-                        'height': shape.height,
-                        'image_data': shape.image.blob
+                        'height': shape.height
                     }
-                    analysis['images'].append(image_data)
-                    print(f"   Found image: {shape.width}x{shape.height} ({len(shape.image.blob)} bytes)")
+                    # Keep only a reference when the bytes can be re-read from the template file;
+                    # otherwise store each distinct image part once, however many shapes show it
+                    if source_key:
+                        image_info['image_ref'] = (source_key, partname)
+                    else:
+                        analysis['image_blobs'].setdefault(partname, blob)
+                        image_info['image_part'] = partname
+                    analysis['images'].append(image_info)
+                    raw_data["images"].append({
+                        "id": f"img_{slide_idx}_{shape_idx}",
+                        "left": int(shape.left),
+                        "top": int(shape.top),
+                        "width": int(shape.width), 
+                        "height": int(shape.height),
+                        "usage_hint": f"appears on slide {slide_idx + 1}",
+                        "size_bytes": len(blob)
+                    })
+                    logger.debug("Found image: %dx%d (%d bytes)", shape.width, shape.height, len(blob))
                 except Exception as e:
-                    print(f"   Image extraction failed: {str(e)}")
+                    logger.warning("Could not extract image %s from slide %s: %s", shape_idx, slide_idx, e)
             
             # Extract shape fills and colors
-            try:
-                if hasattr(shape, 'fill') and shape.fill.solid():
-                    color = shape.fill.fore_color
-                    if color.rgb:
-                        color_hex = f"#{color.rgb:06x}"
-                        if color_hex not in analysis['colors']:
-                            analysis['colors'].append(color_hex)
-            except:
-                pass
+            # Only autoshapes (including text boxes and placeholders) carry a fill; read it without
+            # calling fill.solid(), which would rewrite the shape's fill XML
+            if isinstance(shape, Shape):
+                try:
+                    fill = shape.fill
+                    if fill.type == MSO_FILL.SOLID and fill.fore_color.type == MSO_COLOR_TYPE.RGB:
+                        analysis['_colors'][_rgb_hex(fill.fore_color.rgb)] = None
+                except (AttributeError, TypeError, NotImplementedError):
+                    pass
     
-    def generate_presentation_with_manifest(self, slide_structure, template_path, manifest):
-        """Generate presentation using LLM-generated manifest"""
+    def _load_presentation(self, template):
+        """Return template as a Presentation, parsing it only if given a path"""
+        if isinstance(template, (str, os.PathLike)):
+            return Presentation(template)
+        return template
+    
+    def get_slide_dimensions(self, template):
+        """
+        Return {'width', 'height'} in EMU without analyzing the template
+        File templates only have ppt/presentation.xml read, not the whole package
+        """
+        if not isinstance(template, (str, os.PathLike)):
+            return {'width': template.slide_width, 'height': template.slide_height}
+        
+        with zipfile.ZipFile(template) as package:
+            sld_sz = parse_xml(package.read('ppt/presentation.xml')).sldSz
+        if sld_sz is None:
+            return {'width': None, 'height': None}
+        return {'width': sld_sz.cx, 'height': sld_sz.cy}
+    
+    def _remove_slides(self, prs, sld_ids):
+        """
+        Remove the given slide id entries and their relationships from prs
+        Take a snapshot (list) of the entries first; removing elements is cheaper than indexing the live list
+        """
+        sld_id_lst = prs.slides._sldIdLst
+        rIds = [sld_id.rId for sld_id in sld_ids]
+        for sld_id in sld_ids:
+            sld_id_lst.remove(sld_id)
+        
+        # drop_rel() re-scans the whole presentation XML for references on every call;
+        # collect the surviving references once and drop the orphaned relationships in bulk
+        referenced = set(prs.part._element.xpath('//@r:id'))
+        rels = prs.part.rels
+        for rId in rIds:
+            if rId not in referenced:
+                rels.pop(rId)
+    
+    def _clear_all_slides(self, prs):
+        """Remove every slide from prs, keeping its layouts and masters"""
+        self._remove_slides(prs, list(prs.slides._sldIdLst))
+    
+    def generate_presentation_with_manifest(self, slide_structure, template, manifest):
+        """
+        Generate presentation using LLM-generated manifest
+        template may be a file path or an already-loaded Presentation, which is modified in place
+        Only the manifest is used: this pipeline replaces analyze_template, so callers should not run it
+        (use extract_raw_template_data for the manifest input, get_slide_dimensions for sizes)
+        """
         try:
-            print(f"🎨 Generating presentation with manifest using template: {template_path}")
+            logger.info("🎨 Generating presentation with manifest")
             
             # Load the template as base
-            prs = Presentation(template_path)
+            prs = self._load_presentation(template)
+            
+            logger.debug("Template loaded: %d slides, %d layouts", len(prs.slides), len(prs.slide_layouts))
+            logger.debug("Manifest provides: %d layout rules", len(manifest.get('layouts', [])))
             
-            print(f"   Template loaded: {len(prs.slides)} slides, {len(prs.slide_layouts)} layouts")
-            print(f"   Manifest provides: {len(manifest.get('layouts', []))} layout rules")
+            # Resolve everything the per-slide pass needs once; assets are traced to their
+            # image parts here, while the template slides still exist
+            deck_plan = self._build_deck_plan(prs, manifest)
             
             # Clear all existing slides
-            original_slides_count = len(prs.slides)
-            slide_idxs = list(range(original_slides_count - 1, -1, -1))
-            for i in slide_idxs:
-                rId = prs.slides._sldIdLst[i].rId
-                prs.part.drop_rel(rId)
-                del prs.slides._sldIdLst[i]
+            self._clear_all_slides(prs)
             
             # Generate new slides using manifest rules
             slides_generated = 0
             for slide_idx, slide_content in enumerate(slide_structure.get('slides', [])):
-                self._create_slide_with_manifest(prs, slide_content, manifest, slide_idx)
+                self._create_slide_with_manifest(prs, slide_content, manifest, slide_idx, deck_plan)
                 slides_generated += 1
             
-            print(f"   Generated {slides_generated} slides using manifest")
+            logger.info("Generated %d slides using manifest", slides_generated)
             
             return prs
             
         except Exception as e:
-            print(f"❌ Error in manifest-based generation: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error in manifest-based generation: %s", e)
             raise e
 
     def generate_presentation(self, slide_structure, template_analysis, template_path):
-        """Generate presentation with better template preservation (legacy method)"""
+        """Generate presentation with better template preservation (legacy method), returning a file path"""
+        output_buffer = self.generate_presentation_to_stream(slide_structure, template_analysis, template_path)
+        
+        output_path = os.path.join(self.temp_dir, f'generated_presentation_{uuid.uuid4().hex}.pptx')
+        with open(output_path, 'wb') as f:
+            f.write(output_buffer.getbuffer())
+        
+        logger.info("✅ Presentation saved: %s", output_path)
+        
+        return output_path
+    
+    def generate_presentation_to_stream(self, slide_structure, template_analysis, template_path):
+        """Generate presentation like generate_presentation, returning an in-memory BytesIO positioned at 0"""
         try:
-            print(f"🎨 Generating presentation using template: {template_path}")
+            logger.info("🎨 Generating presentation using template: %s", template_path)
             
-            # Load the template as base - DON'T clear slides immediately
+            # Load the template as base
             prs = Presentation(template_path)
             
-            print(f"   Template loaded: {len(prs.slides)} slides, {len(prs.slide_layouts)} layouts")
-            
-            # Only clear content slides, keep at least one slide as reference
-            original_slides_count = len(prs.slides)
-            
-            # Remove slides but keep the first one as a style reference
-            if original_slides_count > 1:
-                slide_idxs = list(range(original_slides_count - 1, 0, -1))  # Keep first slide
-                for i in slide_idxs:
-                    rId = prs.slides._sldIdLst[i].rId
-                    prs.part.drop_rel(rId)
-                    del prs.slides._sldIdLst[i]
+            logger.debug("Template loaded: %d slides, %d layouts", len(prs.slides), len(prs.slide_layouts))
             
-            # Clear content of the remaining slide but keep its layout
-            if len(prs.slides) > 0:
-                first_slide = prs.slides[0]
-                # Clear text content but keep structure
-                for shape in first_slide.shapes:
-                    if hasattr(shape, 'text_frame'):
-                        shape.text = ""
+            # Clear all existing slides; styling comes from the layouts and masters, not the sample slides
+            self._clear_all_slides(prs)
             
             # Generate new slides based on structure
             slides_generated = 0
@@ -258,26 +441,17 @@ class ImprovedPPTProcessor:
                 self._create_slide_enhanced(prs, slide_content, template_analysis)
                 slides_generated += 1
             
-            print(f"   Generated {slides_generated} slides")
+            logger.info("Generated %d slides", slides_generated)
             
-            # Remove the original first slide if we generated new ones
-            if slides_generated > 0 and len(prs.slides) > slides_generated:
-                rId = prs.slides._sldIdLst[0].rId
-                prs.part.drop_rel(rId)
-                del prs.slides._sldIdLst[0]
+            # Serialize in memory; callers that need a file use generate_presentation
+            output_buffer = io.BytesIO()
+            prs.save(output_buffer)
+            output_buffer.seek(0)
             
-            # Save the new presentation
-            output_path = os.path.join(self.temp_dir, 'generated_presentation.pptx')
-            prs.save(output_path)
-            
-            print(f"✅ Presentation saved: {output_path}")
-            
-            return output_path
+            return output_buffer
             
         except Exception as e:
-            print(f"❌ Error generating presentation: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generating presentation: %s", e)
             raise e
     
     def _create_slide_enhanced(self, prs, slide_content, template_analysis):
@@ -287,17 +461,20 @@ class ImprovedPPTProcessor:
             layout_idx = self._choose_layout_enhanced(slide_content, template_analysis)
             layout = prs.slide_layouts[layout_idx] if layout_idx < len(prs.slide_layouts) else prs.slide_layouts[0]
             
-            print(f"   Creating slide with layout: {layout.name}")
+            logger.debug("Creating slide with layout: %s", layout.name)
             
             slide = prs.slides.add_slide(layout)
             
             # Add title with enhanced formatting
-            if 'title' in slide_content and slide.shapes.title:
-                slide.shapes.title.text = slide_content['title']
-                self._apply_enhanced_formatting(slide.shapes.title, template_analysis, is_title=True)
+            # slide.shapes.title searches the shape tree each time, so look it up once
+            title_shape = slide.shapes.title
+            if 'title' in slide_content and title_shape:
+                title_shape.text = slide_content['title']
+                self._apply_enhanced_formatting(title_shape, template_analysis, is_title=True)
             
             # Add content with enhanced formatting
-            content_shapes = [shape for shape in slide.shapes if shape.has_text_frame and shape != slide.shapes.title]
+            # (shape proxies are recreated per access, so compare with != rather than identity)
+            content_shapes = [shape for shape in slide.shapes if shape.has_text_frame and shape != title_shape]
             
             if 'content' in slide_content and content_shapes:
                 content_shape = content_shapes[0]
@@ -319,9 +496,26 @@ class ImprovedPPTProcessor:
             self._add_template_images_enhanced(slide, template_analysis)
             
         except Exception as e:
-            print(f"❌ Error creating slide: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error creating slide: %s", e)
+    
+    def _index_template_choices(self, analysis):
+        """
+        Record the layouts _choose_layout_enhanced picks for title and list slides, and the largest
+        font used for titles. Layouts and fonts are fixed once analyzed, so this is done once
+        instead of rescanning them per slide or shape
+        """
+        title_idx = content_idx = None
+        for i, layout in enumerate(analysis.get('layouts', [])):
+            name = layout['name'].lower()
+            if title_idx is None and 'title' in name and 'content' not in name:
+                title_idx = i
+            if content_idx is None and any('CONTENT' in p.get('type', '') for p in layout.get('placeholders', [])):
+                content_idx = i
+        analysis['_title_layout_idx'] = title_idx
+        analysis['_content_layout_idx'] = content_idx
+        
+        fonts = analysis.get('fonts', [])
+        analysis['_title_font_idx'] = max(range(len(fonts)), key=lambda i: fonts[i].get('size', 12)) if fonts else None
     
     def _choose_layout_enhanced(self, slide_content, template_analysis):
         """Enhanced layout selection"""
@@ -330,21 +524,20 @@ class ImprovedPPTProcessor:
         if not layouts:
             return 0
         
+        if '_title_layout_idx' not in template_analysis:
+            self._index_template_choices(template_analysis)
+        
         # More sophisticated layout selection
         content_type = slide_content.get('type', '')
         has_list_content = isinstance(slide_content.get('content'), list)
         
         # Look for title slide layout for first slide
-        if content_type == 'title_slide':
-            for i, layout in enumerate(layouts):
-                if 'title' in layout['name'].lower() and 'content' not in layout['name'].lower():
-                    return i
+        if content_type == 'title_slide' and template_analysis['_title_layout_idx'] is not None:
+            return template_analysis['_title_layout_idx']
         
         # Look for content layouts for regular slides
-        if has_list_content:
-            for i, layout in enumerate(layouts):
-                if any('CONTENT' in p.get('type', '') for p in layout.get('placeholders', [])):
-                    return i
+        if has_list_content and template_analysis['_content_layout_idx'] is not None:
+            return template_analysis['_content_layout_idx']
         
         # Default to the second layout (usually title + content)
         return min(1, len(layouts) - 1)
@@ -355,30 +548,33 @@ class ImprovedPPTProcessor:
             return
         
         fonts = template_analysis.get('fonts', [])
-        colors = template_analysis.get('colors', []) + template_analysis.get('theme_colors', [])
+        if '_title_font_idx' not in template_analysis:
+            self._index_template_choices(template_analysis)
+        
+        # The font choice is the same for every run in the shape, so decide it once
+        if fonts:
+            # Use largest font for titles, medium for content
+            font_info = fonts[template_analysis['_title_font_idx']] if is_title else fonts[0]
+            font_name = font_info.get('name', 'Calibri')
+            if is_title:
+                font_size, font_bold = Pt(max(font_info.get('size', 24), 24)), True
+            else:
+                font_size, font_bold = Pt(font_info.get('size', 18)), font_info.get('bold', False)
         
         # Apply formatting to all text
         for paragraph in shape.text_frame.paragraphs:
             for run in paragraph.runs:
                 # Apply font with better selection
                 if fonts:
-                    # Use largest font for titles, medium for content
-                    font_info = max(fonts, key=lambda f: f.get('size', 12)) if is_title else fonts[0]
-                    
-                    run.font.name = font_info.get('name', 'Calibri')
-                    
-                    if is_title:
-                        run.font.size = Pt(max(font_info.get('size', 24), 24))
-                        run.font.bold = True
-                    else:
-                        run.font.size = Pt(font_info.get('size', 18))
-                        run.font.bold = font_info.get('bold', False)
+                    run.font.name = font_name
+                    run.font.size = font_size
+                    run.font.bold = font_bold
                 
                 # Force all text to be black for readability
                 # (Override any template colors that might be white or light)
                 try:
-                    run.font.color.rgb = RGBColor(0, 0, 0)  # Black color
-                except:
+                    run.font.color.rgb = _BLACK
+                except (AttributeError, TypeError, ValueError):
                     pass
     
     def _add_template_images_enhanced(self, slide, template_analysis):
@@ -386,7 +582,7 @@ class ImprovedPPTProcessor:
         images = template_analysis.get('images', [])
         
         if not images:
-            print("   No template images found to add")
+            logger.debug("No template images found to add")
             return
         
         # Add images more intelligently
@@ -395,8 +591,8 @@ class ImprovedPPTProcessor:
                 break
             
             try:
-                print(f"   Adding template image {i+1}")
-                image_stream = io.BytesIO(image_info['image_data'])
+                logger.debug("Adding template image %d", i+1)
+                image_stream = io.BytesIO(self._resolve_image_blob(image_info, template_analysis))
                 
                 # Position images better - avoid overlapping with text
                 left = image_info['left']
@@ -412,10 +608,16 @@ class ImprovedPPTProcessor:
                     image_stream,
                     left, top, width, height
                 )
-                print(f"   ✅ Image added successfully")
+                logger.debug("✅ Image added successfully")
                 
             except Exception as e:
-                print(f"   ❌ Failed to add image {i+1}: {str(e)}")
+                logger.warning("❌ Failed to add image %d: %s", i+1, e)
+    
+    def _resolve_image_blob(self, image_info, template_analysis):
+        """Return the bytes of an analysis image entry, reading referenced parts from the template"""
+        if 'image_part' in image_info:
+            return template_analysis['image_blobs'][image_info['image_part']]
+        return _read_template_part(*image_info['image_ref'])
     
     def _get_default_analysis(self):
         """Enhanced default analysis"""
@@ -433,117 +635,23 @@ class ImprovedPPTProcessor:
             'master_slides': []
         }
     
-    def extract_raw_template_data(self, template_path):
-        """Extract raw template metadata for LLM processing"""
+    def extract_raw_template_data(self, template):
+        """
+        Extract raw template metadata for LLM processing
+        template may be a file path or an already-loaded Presentation
+        """
         try:
-            prs = Presentation(template_path)
+            _, raw_data = self._walk_template_cached(template)
             
-            raw_data = {
-                "slide_size": {
-                    "width_emu": int(prs.slide_width),
-                    "height_emu": int(prs.slide_height)
-                },
-                "theme": {
-                    "colors": {},
-                    "fonts": {}
-                },
-                "layouts": [],
-                "images": []
-            }
-            
-            print(f"🔍 Extracting raw data from template: {len(prs.slide_layouts)} layouts")
-            
-            # Extract theme colors
-            try:
-                for i, master in enumerate(prs.slide_masters):
-                    if master.theme and master.theme.color_scheme:
-                        color_scheme = master.theme.color_scheme
-                        for j in range(12):
-                            try:
-                                color = color_scheme[j]
-                                if hasattr(color, 'rgb'):
-                                    color_name = f"theme_color_{j}"
-                                    if j == 0: color_name = "bg1"
-                                    elif j == 1: color_name = "text1" 
-                                    elif j == 2: color_name = "bg2"
-                                    elif j == 3: color_name = "text2"
-                                    elif j == 4: color_name = "accent1"
-                                    elif j == 5: color_name = "accent2"
-                                    elif j == 6: color_name = "accent3"
-                                    elif j == 7: color_name = "accent4"
-                                    elif j == 8: color_name = "accent5"
-                                    elif j == 9: color_name = "accent6"
-                                    
-                                    raw_data["theme"]["colors"][color_name] = f"#{color.rgb:06x}"
-                            except:
-                                pass
-                    
-                    # Extract font scheme
-                    try:
-                        if master.theme and master.theme.font_scheme:
-                            font_scheme = master.theme.font_scheme
-                            if hasattr(font_scheme, 'major_font') and font_scheme.major_font:
-                                raw_data["theme"]["fonts"]["major"] = font_scheme.major_font.latin
-                            if hasattr(font_scheme, 'minor_font') and font_scheme.minor_font:
-                                raw_data["theme"]["fonts"]["minor"] = font_scheme.minor_font.latin
-                    except:
-                        pass
-            except:
-                pass
-            
-            # Extract layouts with placeholders
-            for i, layout in enumerate(prs.slide_layouts):
-                layout_data = {
-                    "index": i,
-                    "name": layout.name,
-                    "placeholders": []
-                }
-                
-                for placeholder in layout.placeholders:
-                    try:
-                        ph_data = {
-                            "kind": str(placeholder.placeholder_format.type).split('.')[-1],  # Get enum name
-                            "left": int(placeholder.left),
-                            "top": int(placeholder.top), 
-                            "width": int(placeholder.width),
-                            "height": int(placeholder.height)
-                        }
-                        layout_data["placeholders"].append(ph_data)
-                    except:
-                        pass
-                
-                raw_data["layouts"].append(layout_data)
-            
-            # Extract images from slides
-            for slide_idx, slide in enumerate(prs.slides):
-                for shape_idx, shape in enumerate(slide.shapes):
-                    if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                        try:
-                            img_data = {
-                                "id": f"img_{slide_idx}_{shape_idx}",
-                                "left": int(shape.left),
-                                "top": int(shape.top),
-                                "width": int(shape.width), 
-                                "height": int(shape.height),
-                                "usage_hint": f"appears on slide {slide_idx + 1}",
-                                "size_bytes": len(shape.image.blob)
-                            }
-                            raw_data["images"].append(img_data)
-                        except Exception as e:
-                            print(f"   Could not extract image {shape_idx} from slide {slide_idx}: {e}")
-            
-            print(f"✅ Raw extraction complete:")
-            print(f"   - Slide size: {raw_data['slide_size']}")
-            print(f"   - Theme colors: {len(raw_data['theme']['colors'])}")
-            print(f"   - Layouts: {len(raw_data['layouts'])}")
-            print(f"   - Images: {len(raw_data['images'])}")
+            logger.info(
+                "✅ Raw extraction complete: slide size %s, %d theme colors, %d layouts, %d images",
+                raw_data['slide_size'], len(raw_data['theme']['colors']), len(raw_data['layouts']), len(raw_data['images'])
+            )
             
             return raw_data
             
         except Exception as e:
-            print(f"❌ Error extracting raw template data: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error extracting raw template data: %s", e)
             return {
                 "slide_size": {"width_emu": 9144000, "height_emu": 6858000},
                 "theme": {"colors": {}, "fonts": {}},
@@ -551,48 +659,64 @@ class ImprovedPPTProcessor:
                 "images": []
             }
 
-    def _create_slide_with_manifest(self, prs, slide_content, manifest, slide_idx):
-        """Create slide using manifest-defined rules"""
+    def _build_deck_plan(self, prs, manifest):
+        """Per-deck state shared by every _create_slide_with_manifest call; build before clearing slides"""
+        return {
+            'layout_index': self._build_layout_index(prs),
+            'style_plan': self._build_style_plan(manifest),
+            'asset_parts': self._resolve_manifest_assets(prs, manifest),
+            'notes_cache': {}
+        }
+    
+    def _create_slide_with_manifest(self, prs, slide_content, manifest, slide_idx, deck_plan=None):
+        """Create slide using manifest-defined rules: layout, then styling, assets and notes in one pass"""
         try:
-            print(f"   Creating slide {slide_idx + 1}: {slide_content.get('title', 'Untitled')}")
+            if deck_plan is None:
+                deck_plan = self._build_deck_plan(prs, manifest)
+            
+            logger.debug("Creating slide %d: %s", slide_idx + 1, slide_content.get('title', 'Untitled'))
             
             # Determine layout based on content type and manifest
-            layout_choice = self._resolve_layout_from_manifest(slide_content, manifest, slide_idx, prs)
+            layout_choice = self._resolve_layout_from_manifest(slide_content, manifest, slide_idx, prs, deck_plan['layout_index'])
             
             if not layout_choice:
-                print(f"     Warning: No suitable layout found, using first available")
+                logger.warning("No suitable layout found, using first available")
                 layout_choice = prs.slide_layouts[1] if len(prs.slide_layouts) > 1 else prs.slide_layouts[0]
             
             # Create slide with chosen layout
             slide = prs.slides.add_slide(layout_choice)
-            print(f"     Using layout: {layout_choice.name}")
+            logger.debug("Using layout: %s", layout_choice.name)
             
             # Apply manifest-based styling
-            self._apply_manifest_styling(slide, slide_content, manifest)
+            self._apply_manifest_styling(slide, slide_content, manifest, deck_plan['style_plan'])
             
             # Add template assets if specified
-            self._add_manifest_assets(slide, manifest, slide_idx)
+            self._add_manifest_assets(slide, slide_idx, deck_plan['asset_parts'])
             
             # Add speaker notes if available
-            self._add_speaker_notes(slide, slide_content)
+            self._add_speaker_notes(slide, slide_content, deck_plan['notes_cache'])
             
             return slide
             
         except Exception as e:
-            print(f"     Error creating slide {slide_idx + 1}: {str(e)}")
+            logger.warning("Error creating slide %d: %s", slide_idx + 1, e)
             # Fallback to basic slide creation
             layout = prs.slide_layouts[1] if len(prs.slide_layouts) > 1 else prs.slide_layouts[0]
             slide = prs.slides.add_slide(layout)
             
             # Basic content population
-            if hasattr(slide.shapes, 'title') and slide.shapes.title:
-                slide.shapes.title.text = slide_content.get('title', '')
+            title_shape = slide.shapes.title
+            if title_shape:
+                title_shape.text = slide_content.get('title', '')
             
             return slide
     
-    def _resolve_layout_from_manifest(self, slide_content, manifest, slide_idx, prs):
+    def _resolve_layout_from_manifest(self, slide_content, manifest, slide_idx, prs, layout_index=None):
         """Choose appropriate layout based on manifest rules and content"""
         try:
+            if layout_index is None:
+                layout_index = self._build_layout_index(prs)
+            
             # Get layout rules from manifest
             manifest_layouts = manifest.get('layouts', [])
             
@@ -606,93 +730,129 @@ class ImprovedPPTProcessor:
             content_type = slide_content.get('layout_hint', '')
             
             # Layout selection logic - prioritize content-capable layouts
-            print(f"         Layout selection: slide_idx={slide_idx}, has_content={has_content}, content_length={content_length}")
-            
-            # If we have content, prioritize layouts that can display content
-            if has_content and content_length > 0:
-                print(f"         Has content ({content_length} chars), looking for content-capable layouts...")
-                
-                # First priority: title_content layouts
-                for layout_def in manifest_layouts:
-                    if layout_def.get('archetype') == 'title_content':
-                        print(f"         Found title_content layout: {layout_def.get('name')}")
-                        return self._find_layout_by_name(layout_def.get('name'), prs)
-                
-                # Second priority: two_content layouts for longer content
-                if content_length > 200:
-                    for layout_def in manifest_layouts:
-                        if layout_def.get('archetype') in ['two_content']:
-                            print(f"         Found two_content layout: {layout_def.get('name')}")
-                            return self._find_layout_by_name(layout_def.get('name'), prs)
-                
-                # Third priority: any content layout
-                for layout_def in manifest_layouts:
-                    if 'content' in layout_def.get('archetype', '').lower():
-                        print(f"         Found content layout: {layout_def.get('name')}")
-                        return self._find_layout_by_name(layout_def.get('name'), prs)
-            
-            # Only use section headers for slides explicitly marked as sections or without content
-            if content_type == 'section' or not has_content:
-                print(f"         Looking for section/title-only layouts...")
-                for layout_def in manifest_layouts:
-                    if layout_def.get('archetype') in ['section_header', 'title_only']:
-                        print(f"         Found section layout: {layout_def.get('name')}")
-                        return self._find_layout_by_name(layout_def.get('name'), prs)
+            logger.debug("Layout selection: slide_idx=%s, has_content=%s, content_length=%s", slide_idx, has_content, content_length)
+            
+            # One pass ranks every manifest layout; lower rank wins and the first layout wins ties:
+            # 0 title_content, 1 two_content (long content), 2 any content layout, 3 section/title-only
+            wants_content = has_content and content_length > 0
+            wants_section = content_type == 'section' or not has_content
+            best_rank, best_def = None, None
+            for layout_def in manifest_layouts:
+                archetype = layout_def.get('archetype') or ''
+                rank = None
+                if wants_content:
+                    if archetype == 'title_content':
+                        rank = 0
+                    elif archetype == 'two_content' and content_length > 200:
+                        rank = 1
+                    elif 'content' in archetype.lower():
+                        rank = 2
+                if rank is None and wants_section and archetype in _SECTION_ARCHETYPES:
+                    rank = 3
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank, best_def = rank, layout_def
+                    if rank == 0:
+                        break
+            
+            if best_def is not None:
+                logger.debug("Found %s layout: %s", best_def.get('archetype'), best_def.get('name'))
+                return self._find_layout_by_name(best_def.get('name'), prs, layout_index)
             
             # Fallback to first layout
             if manifest_layouts:
-                return self._find_layout_by_name(manifest_layouts[0].get('name'), prs)
+                return self._find_layout_by_name(manifest_layouts[0].get('name'), prs, layout_index)
             
             return None
             
         except Exception as e:
-            print(f"     Warning: Layout resolution failed: {str(e)}")
+            logger.warning("Layout resolution failed: %s", e)
             return None
     
-    def _find_layout_by_name(self, layout_name, prs):
+    def _build_layout_index(self, prs):
+        """Map layout name -> layout, keeping the first layout for duplicate names"""
+        layout_index = {}
+        for layout in prs.slide_layouts:
+            layout_index.setdefault(layout.name, layout)
+        return layout_index
+    
+    def _find_layout_by_name(self, layout_name, prs, layout_index):
         """Find PowerPoint layout by name"""
         try:
-            if not hasattr(prs, 'slide_layouts'):
-                return None
-                
-            for layout in prs.slide_layouts:
-                if layout.name == layout_name:
-                    return layout
+            layout = layout_index.get(layout_name)
+            if layout is not None:
+                return layout
             
             # Fallback - return first available layout
             return prs.slide_layouts[1] if len(prs.slide_layouts) > 1 else prs.slide_layouts[0]
             
-        except:
+        except IndexError:
+            # Template without any layouts
             return None
     
-    def _apply_manifest_styling(self, slide, slide_content, manifest):
+    def _build_style_plan(self, manifest):
+        """Resolve the manifest's text rules into what the styling code applies, once per deck"""
+        text_defaults = manifest.get('text_defaults', {})
+        body_rules = (text_defaults.get('body') or [{}])[0]
+        
+        # a:rPr attributes for generated body runs (sz is in hundredths of a point)
+        body_run_attrs = {}
+        if body_rules.get('size_pt'):
+            body_run_attrs['sz'] = str(int(body_rules['size_pt'] * 100))
+        if body_rules.get('bold'):
+            body_run_attrs['b'] = '1'
+        
+        return {
+            'title_rules': text_defaults.get('title', {}),
+            'palette': manifest.get('theme', {}).get('palette', {}),
+            'body_run_attrs': body_run_attrs,
+            'body_family': body_rules.get('family')
+        }
+    
+    def _apply_manifest_styling(self, slide, slide_content, manifest, style_plan=None):
         """Apply text formatting and colors from manifest"""
         try:
-            # Get styling rules from manifest
-            text_defaults = manifest.get('text_defaults', {})
-            theme_palette = manifest.get('theme', {}).get('palette', {})
-            
-            print(f"       Debug: slide_content = {slide_content}")
+            if style_plan is None:
+                style_plan = self._build_style_plan(manifest)
+            
+            logger.debug("Debug: slide_content = %s", slide_content)
+            
+            # One pass over the placeholders finds the title (idx 0, as slide.shapes.title does)
+            # and categorizes the body candidates, reading each placeholder_format once
+            title_shape = None
+            body_shape = None
+            placeholders = list(slide.placeholders)
+            other_placeholders = []
+            for ph in placeholders:
+                ph_format = ph.placeholder_format
+                if ph_format.idx == 0:
+                    if title_shape is None:
+                        title_shape = ph
+                    continue
+                ph_type = ph_format.type
+                logger.debug("Found placeholder type: %s", ph_type)
+                if ph_type == PP_PLACEHOLDER.BODY:
+                    if body_shape is None:
+                        body_shape = ph
+                elif ph_type != PP_PLACEHOLDER.TITLE and ph.has_text_frame:
+                    other_placeholders.append(ph)
             
             # Apply title styling
             title_text = slide_content.get('title', '')
-            print(f"       Title: '{title_text}'")
+            logger.debug("Title: '%s'", title_text)
             
-            if hasattr(slide.shapes, 'title') and slide.shapes.title:
-                title_shape = slide.shapes.title
+            if title_shape:
                 title_shape.text = title_text
                 
                 if title_shape.text_frame:
-                    title_rules = text_defaults.get('title', {})
-                    self._apply_text_formatting(title_shape.text_frame, title_rules, theme_palette)
+                    self._apply_text_formatting(title_shape.text_frame, style_plan['title_rules'], style_plan['palette'])
             
             # Apply body content styling
             body_content = slide_content.get('content', '')
-            print(f"       Content: '{body_content}' (type: {type(body_content)})")
+            logger.debug("Content: '%s' (type: %s)", body_content, type(body_content))
             
             # Handle empty content with fallback
             if not body_content:
-                print(f"       ⚠️  Empty content detected, using title as content fallback")
+                logger.warning("⚠️  Empty content detected, using title as content fallback")
                 body_content = f"Key points about {title_text}" if title_text else "Content will be added here"
             
             if body_content:
@@ -702,70 +862,41 @@ class ImprovedPPTProcessor:
                 else:
                     body_text = str(body_content)
                 
-                print(f"       Processed body text: '{body_text[:100]}...'")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Processed body text: '%s...'", body_text[:100])
                 
-                # Find body placeholder - try multiple approaches
-                body_shape = None
+                # Without a BODY placeholder, fall back to the second placeholder, which is usually the body
+                if not body_shape and len(placeholders) > 1:
+                    body_shape = placeholders[1]
+                    logger.debug("Using placeholder index 1")
                 
-                # Method 1: Find by placeholder type (BODY = 2)
-                for shape in slide.shapes:
-                    if hasattr(shape, 'placeholder_format'):
-                        ph_type = shape.placeholder_format.type
-                        print(f"         Found placeholder type: {ph_type}")
-                        if ph_type == 2:  # BODY placeholder
-                            body_shape = shape
-                            print(f"         Using BODY placeholder (type 2)")
-                            break
-                
-                # Method 2: Find by placeholder index if method 1 fails
-                if not body_shape:
-                    try:
-                        print(f"         Trying placeholder by index...")
-                        for i, shape in enumerate(slide.placeholders):
-                            print(f"           Placeholder {i}: {shape.placeholder_format.type if hasattr(shape, 'placeholder_format') else 'no format'}")
-                            if i == 1:  # Usually second placeholder is body
-                                body_shape = shape
-                                print(f"         Using placeholder index 1")
-                                break
-                    except Exception as e:
-                        print(f"         Placeholder index method failed: {e}")
+                # Then any text placeholder that isn't the title
+                if not body_shape and other_placeholders:
+                    body_shape = other_placeholders[0]
+                    logger.debug("Using non-title placeholder")
                 
-                # Method 3: Find text placeholders that aren't title
+                # Finally any text shape that's not the title
                 if not body_shape:
-                    print(f"         Looking for any non-title text placeholder...")
+                    logger.debug("Using fallback: any text shape that's not title...")
                     for shape in slide.shapes:
-                        if hasattr(shape, 'placeholder_format') and hasattr(shape, 'text_frame'):
-                            ph_type = shape.placeholder_format.type
-                            if ph_type != 1 and shape != getattr(slide.shapes, 'title', None):  # Not TITLE placeholder
-                                body_shape = shape
-                                print(f"         Using non-title placeholder (type {ph_type})")
-                                break
-                
-                # Method 4: Find any text shape that's not the title
-                if not body_shape:
-                    print(f"         Using fallback: any text shape that's not title...")
-                    for shape in slide.shapes:
-                        if (hasattr(shape, 'text_frame') and 
-                            shape != getattr(slide.shapes, 'title', None)):
+                        if shape.has_text_frame and shape != title_shape:
                             body_shape = shape
-                            print(f"         Using fallback text shape")
+                            logger.debug("Using fallback text shape")
                             break
                 
                 if body_shape and hasattr(body_shape, 'text_frame'):
-                    body_shape.text = body_text
-                    body_rules = text_defaults.get('body', [{}])[0]
-                    self._apply_text_formatting(body_shape.text_frame, body_rules, theme_palette)
-                    print(f"       ✅ Content applied to body shape")
+                    self._set_styled_paragraphs(body_shape.text_frame, body_text.split('\n'),
+                                                style_plan['body_run_attrs'], style_plan['body_family'])
+                    logger.debug("✅ Content applied to body shape")
                 else:
-                    print(f"       ❌ No suitable body shape found")
-                    print(f"         Available shapes: {[type(s).__name__ for s in slide.shapes]}")
+                    logger.warning("❌ No suitable body shape found")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Available shapes: %s", [type(s).__name__ for s in slide.shapes])
             else:
-                print(f"       ⚠️ No body content to apply")
+                logger.warning("⚠️ No body content to apply")
             
         except Exception as e:
-            print(f"     ❌ Styling application failed: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Styling application failed: %s", e)
     
     def _apply_text_formatting(self, text_frame, format_rules, palette):
         """Apply specific formatting rules to text frame"""
@@ -795,62 +926,160 @@ class ImprovedPPTProcessor:
             # Force all text to be black for readability
             # (Override any template colors that might be white or light)
             try:
-                font.color.rgb = RGBColor(0, 0, 0)  # Black color
-                print(f"         Applied black text color")
+                font.color.rgb = _BLACK
+                logger.debug("Applied black text color")
             except Exception as color_error:
-                print(f"         Warning: Could not apply black color: {str(color_error)}")
+                logger.warning("Could not apply black color: %s", color_error)
                 pass
             
         except Exception as e:
-            print(f"     Warning: Text formatting failed: {str(e)}")
+            logger.warning("Text formatting failed: %s", e)
     
-    def _add_manifest_assets(self, slide, manifest, slide_idx):
-        """Add template images/assets based on manifest rules"""
-        try:
-            assets = manifest.get('assets', [])
+    def _set_styled_paragraphs(self, text_frame, lines, run_attrs, family=None):
+        """
+        Replace the text frame content with one paragraph per line, built as XML in one batch
+        Like TextFrame.text followed by _apply_text_formatting, only the first paragraph's run is
+        formatted; later paragraphs keep the placeholder's own styling
+        """
+        txBody = text_frame._txBody
+        txBody.clear_content()
+        
+        for i, line in enumerate(lines):
+            p = txBody.add_p()
+            # Empty lines stay as empty paragraphs, like TextFrame.text does
+            if not line:
+                continue
+            r = etree.SubElement(p, qn('a:r'))
+            if i == 0:
+                rPr = etree.SubElement(r, qn('a:rPr'), run_attrs)
+                # Same forced black as _apply_text_formatting; solidFill must precede latin
+                solid_fill = etree.SubElement(rPr, qn('a:solidFill'))
+                etree.SubElement(solid_fill, qn('a:srgbClr'), val='000000')
+                if family:
+                    etree.SubElement(rPr, qn('a:latin'), typeface=family)
+            etree.SubElement(r, qn('a:t')).text = _CTRL_CHARS.sub(lambda m: "_x%04X_" % ord(m.group()), line)
+    
+    def _resolve_manifest_assets(self, prs, manifest):
+        """
+        Map the manifest assets that apply to any slide onto the template image parts they came from
+        Call before clearing slides: asset ids (img_<slide>_<shape>) index the template's original slides
+        """
+        slides = list(prs.slides)
+        asset_parts = []
+        for asset in manifest.get('assets', []):
+            apply_policy = asset.get('apply_on', 'none')
+            if apply_policy not in ('all', 'title_only'):
+                continue
+            
+            # Only ids we issued can be traced back to a template picture; anything else the
+            # LLM invented is reported rather than silently dropped
+            match = _ASSET_ID.match(str(asset.get('id', '')))
+            if match is None:
+                logger.warning("Skipping asset %s: not an img_<slide>_<shape> id from the template", asset.get('id'))
+                continue
             
-            for asset in assets:
-                apply_policy = asset.get('apply_on', 'none')
-                
+            try:
+                picture = slides[int(match.group(1))].shapes[int(match.group(2))]
+                image_part = picture.part.related_part(picture._element.blip_rId)
+                geometry = tuple(int(asset[key]) for key in ('left', 'top', 'width', 'height'))
+            except (KeyError, IndexError, ValueError, TypeError, AttributeError) as e:
+                logger.warning("Skipping asset %s: %s", asset.get('id'), e)
+                continue
+            
+            asset_parts.append({
+                'id': asset['id'],
+                'apply_on': apply_policy,
+                'image_part': image_part,
+                'desc': image_part.desc,
+                'geometry': geometry
+            })
+        
+        return asset_parts
+    
+    def _add_manifest_assets(self, slide, slide_idx, asset_parts):
+        """Add template images/assets resolved by _resolve_manifest_assets to the slide"""
+        try:
+            for asset in asset_parts:
                 # Check if this asset should be applied to this slide
-                should_apply = (
-                    apply_policy == 'all' or
-                    (apply_policy == 'title_only' and slide_idx == 0)
-                )
+                if asset['apply_on'] == 'title_only' and slide_idx != 0:
+                    continue
                 
-                if should_apply:
-                    # For now, just print that we would add this asset
-                    print(f"     Would add asset {asset.get('id')} at position ({asset.get('left')}, {asset.get('top')})")
-                    # TODO: Implement actual image copying from template
+                # Relate the already-loaded image part and write the p:pic directly; add_picture
+                # would re-read, hash and parse the image bytes again for every slide
+                rId = slide.part.relate_to(asset['image_part'], RT.IMAGE)
+                shapes = slide.shapes
+                shape_id = shapes._next_shape_id
+                shapes._spTree.add_pic(shape_id, "Picture %d" % (shape_id - 1), asset['desc'], rId, *asset['geometry'])
+                logger.debug("Added asset %s at position %s", asset['id'], asset['geometry'][:2])
             
         except Exception as e:
-            print(f"     Warning: Asset addition failed: {str(e)}")
+            logger.warning("Asset addition failed: %s", e)
 
-    def _add_speaker_notes(self, slide, slide_content):
-        """Add speaker notes to the slide"""
+    def _add_speaker_notes(self, slide, slide_content, notes_cache=None):
+        """
+        Add speaker notes to the slide
+        notes_cache is one dict shared across a deck, letting later slides clone the first notes slide
+        """
         try:
             speaker_notes = slide_content.get('speaker_notes', '')
             
             if speaker_notes:
-                print(f"       Adding speaker notes: {len(speaker_notes)} characters")
+                logger.debug("Adding speaker notes: %d characters", len(speaker_notes))
                 
                 # Access the notes slide for this slide
-                notes_slide = slide.notes_slide
+                if notes_cache is None:
+                    notes_slide = slide.notes_slide
+                else:
+                    notes_slide = self._new_notes_slide(slide, notes_cache)
                 if notes_slide and hasattr(notes_slide, 'notes_text_frame'):
                     notes_slide.notes_text_frame.text = speaker_notes
-                    print(f"       ✅ Speaker notes added successfully")
+                    logger.debug("✅ Speaker notes added successfully")
                 else:
-                    print(f"       ⚠️  Notes slide not accessible")
+                    logger.warning("⚠️  Notes slide not accessible")
             else:
-                print(f"       No speaker notes provided for this slide")
+                logger.debug("No speaker notes provided for this slide")
                 
         except Exception as e:
-            print(f"     Warning: Speaker notes addition failed: {str(e)}")
+            logger.warning("Speaker notes addition failed: %s", e)
 
+    def _new_notes_slide(self, slide, notes_cache):
+        """
+        Create the slide's notes slide from a copy of the deck's first one
+        python-pptx builds each notes slide by cloning the notes master placeholders and picks
+        its part name with package.next_partname(), which walks every part in the package
+        """
+        template = notes_cache.get('template')
+        if template is None:
+            # The first notes slide goes through python-pptx, which also creates a missing notes master
+            notes_slide = slide.notes_slide
+            package = slide.part.package
+            notes_cache['template'] = copy.deepcopy(notes_slide._element)
+            notes_cache['master_part'] = notes_slide.part.part_related_by(RT.NOTES_MASTER)
+            notes_cache['used_partnames'] = {str(part.partname) for part in package.iter_parts()}
+            notes_cache['next_idx'] = 1
+            return notes_slide
+        
+        used_partnames = notes_cache['used_partnames']
+        idx = notes_cache['next_idx']
+        while '/ppt/notesSlides/notesSlide%d.xml' % idx in used_partnames:
+            idx += 1
+        notes_cache['next_idx'] = idx + 1
+        
+        slide_part = slide.part
+        notes_part = NotesSlidePart(
+            PackURI('/ppt/notesSlides/notesSlide%d.xml' % idx), CT.PML_NOTES_SLIDE,
+            slide_part.package, copy.deepcopy(template)
+        )
+        notes_part.relate_to(notes_cache['master_part'], RT.NOTES_MASTER)
+        notes_part.relate_to(slide_part, RT.SLIDE)
+        slide_part.relate_to(notes_part, RT.NOTES_SLIDE)
+        return notes_part.notes_slide
+    
     def cleanup(self):
         """Clean up temporary files"""
         try:
-            import shutil
-            shutil.rmtree(self.temp_dir)
-        except:
-            pass
+            if self._temp_dir is not None:
+                shutil.rmtree(self._temp_dir)
+                self._temp_dir = None
+        except OSError as e:
+            logger.warning("Could not remove temp dir %s: %s", self._temp_dir, e)
@@ -1,15 +1,240 @@
+import os
+import re
 import json
+import hashlib
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import httpx
+import orjson
 import openai
 from anthropic import Anthropic
 import google.generativeai as genai
 from error_handler import handle_llm_errors, validate_api_key, LLMError, logger
 from retry_handler import retry_llm_call, RetryableOperation, RetryConfigs
+from cache_handler import LRUCache
+
+# Primary model used for each provider; OPENAI_MODEL overrides the OpenAI one (e.g. to pin gpt-4)
+DEFAULT_MODELS = {
+    'openai': os.environ.get('OPENAI_MODEL', 'gpt-4o'),
+    'anthropic': 'claude-3-sonnet-20240229',
+    'gemini': 'gemini-pro'
+}
+
+DEFAULT_SYSTEM_PROMPT = "You are an expert presentation designer who creates well-structured, engaging presentations."
+
+DEFAULT_GUIDANCE = "Create a professional, well-structured presentation"
+
+# Inputs longer than this are split on paragraph boundaries and the parts structured concurrently,
+# so a long document costs roughly one LLM round trip instead of one very long generation
+STRUCTURING_CHUNK_CHARS = 15000
+MAX_STRUCTURING_CHUNKS = 4
+
+# Static instructions are sent as the system prompt so providers can cache the shared prefix;
+# only the input text or template data in the user message changes between requests
+STRUCTURING_SYSTEM_PROMPT = """
+You are an expert presentation designer. Structure the user's text into a PowerPoint presentation.
+- Choose 5-15 slides with a logical narrative; organize key points hierarchically for the text's audience and purpose
+- Return only a JSON object: {"presentation_title":str,"total_slides":int,"slides":[{"slide_number":int,"title":str,"type":"content|bullet_points|conclusion","content":[str]|str,"speaker_notes":str}]}
+- Every slide needs content: 2-5 bullet strings in an array (preferred) or a 50-200 word string; no title-only slides
+- Every slide needs speaker_notes: 2-4 sentences of context or talking points
+- Titles: max 8 words
+"""
+
+# Lower temperature for the JSON-producing calls, so output sticks to the schema
+JSON_TEMPERATURE = 0.3
+
+# OpenAI models accepting response_format={"type": "json_object"}; the original gpt-4 rejects it,
+# so a deployment pinning OPENAI_MODEL=gpt-4 sends plain requests
+_JSON_MODE_MODEL_PREFIXES = ('gpt-4o', 'gpt-4-turbo', 'gpt-4-1106', 'gpt-4-0125', 'gpt-3.5-turbo')
+
+# OpenAI models accepting response_format={"type": "json_schema"} (structured outputs), which
+# includes the default gpt-4o
+_STRUCTURED_OUTPUT_MODEL_PREFIXES = ('gpt-4o', 'gpt-4.1', 'o1', 'o3', 'o4')
+
+# Structured-output schema for STRUCTURING_SYSTEM_PROMPT; strict mode makes the server guarantee a valid deck
+SLIDE_STRUCTURE_SCHEMA = {
+    "name": "slide_structure",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "presentation_title": {"type": "string"},
+            "total_slides": {"type": "integer"},
+            "slides": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "slide_number": {"type": "integer"},
+                        "title": {"type": "string"},
+                        "type": {"type": "string", "enum": ["content", "bullet_points", "conclusion"]},
+                        "content": {"anyOf": [{"type": "array", "items": {"type": "string"}}, {"type": "string"}]},
+                        "speaker_notes": {"type": "string"}
+                    },
+                    "required": ["slide_number", "title", "type", "content", "speaker_notes"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["presentation_title", "total_slides", "slides"],
+        "additionalProperties": False
+    }
+}
+
+MANIFEST_SYSTEM_PROMPT = """
+You are a presentation theme analyst. Convert raw PowerPoint template metadata into a clean manifest without inventing measurements. Preserve numeric geometry exactly.
+
+Produce JSON exactly matching this schema:
+{
+  "slide_size": {"width_emu": number, "height_emu": number},
+  "theme": {
+    "palette": {"primary":"hex","secondary":"hex","accent":["hex"], "text":"hex","background":"hex"},
+    "fonts": {"title_family":"string","body_family":"string"}
+  },
+  "layouts": [
+    {
+      "id":"string_slug",
+      "name":"string", 
+      "archetype":"title_only|title_content|two_content|section_header|other",
+      "placeholders":[{"kind":"TITLE|BODY|PICTURE|FOOTER","left":num,"top":num,"width":num,"height":num}]
+    }
+  ],
+  "text_defaults": {
+    "title":{"family":"string","size_pt":number,"bold":true,"color":"palette_key"},
+    "body":[{"level":0,"family":"string","size_pt":number,"color":"palette_key"}]
+  },
+  "assets": [
+    {"id":"logo_main","left":num,"top":num,"width":num,"height":num,"apply_on":"all|title_only|none"}
+  ],
+  "rules": {
+    "title_color":"palette_key",
+    "body_color":"palette_key", 
+    "logo_policy":"string description"
+  }
+}
+
+Constraints:
+- Do not change numeric geometry values
+- Map theme colors into palette keys but keep original hexes  
+- Infer layout archetypes from placeholder sets and names
+- For text_defaults, suggest reasonable font sizes (title: 28-36pt, body: 16-20pt)
+- If images exist, classify as logos vs decorative and set apply_on appropriately
+- Return only valid JSON, no explanatory text
+"""
+
+# One keep-alive connection pool shared by every OpenAI/Anthropic client, so repeat and
+# concurrent calls reuse open TLS connections instead of handshaking per client
+_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    timeout=60.0,
+)
+atexit.register(_HTTP_CLIENT.close)
+
+# Runs the per-part structuring calls for long inputs; the SDK clients are thread-safe
+_STRUCTURING_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='structure')
+
+def _chunk_text(input_text, max_chars=STRUCTURING_CHUNK_CHARS, max_chunks=MAX_STRUCTURING_CHUNKS):
+    """Split input_text on paragraph boundaries into at most max_chunks parts of similar size"""
+    if len(input_text) <= max_chars:
+        return [input_text]
+    
+    target = max(max_chars, -(-len(input_text) // max_chunks))
+    chunks, current, size = [], [], 0
+    for paragraph in input_text.split('\n\n'):
+        if current and size + len(paragraph) > target:
+            chunks.append('\n\n'.join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+    
+    # Uneven paragraphs can spill into an extra part; fold it into the last one
+    if len(chunks) > max_chunks:
+        chunks[max_chunks - 1:] = ['\n\n'.join(chunks[max_chunks - 1:])]
+    return chunks
+
+_BRACES = re.compile(r'[{}]')
+
+# Whitespace following a full stop, where the fallback structure splits sentences
+_SENTENCE_BREAKS = re.compile(r'(?<=\.)\s+')
+
+def _json_candidates(response):
+    """Yield likely JSON object substrings of an LLM response, the first balanced object first"""
+    start_idx = response.find('{')
+    if start_idx == -1:
+        return
+    
+    # One pass that only visits brace characters finds where the first object closes
+    balanced_end = None
+    depth = 0
+    for match in _BRACES.finditer(response, start_idx):
+        depth += 1 if match.group() == '{' else -1
+        if depth == 0:
+            balanced_end = match.end()
+            yield response[start_idx:balanced_end]
+            break
+    
+    # Wider fallback: first '{' to last '}'
+    end_idx = response.rfind('}') + 1
+    if end_idx > start_idx and end_idx != balanced_end:
+        yield response[start_idx:end_idx]
+
+def _loads_json(json_str):
+    """Parse an extracted JSON candidate with orjson, falling back to json for what orjson rejects (e.g. NaN)"""
+    # Clean up common JSON issues
+    json_str = json_str.replace('\n', ' ').replace('\r', '')
+    # Remove trailing commas before closing braces/brackets
+    json_str = json_str.replace(',}', '}').replace(',]', ']')
+    try:
+        return orjson.loads(json_str)
+    except orjson.JSONDecodeError:
+        return json.loads(json_str)
+
+# (provider, sha256(api_key)) -> SDK client, so every integration for a key shares one client
+_SDK_CLIENTS = LRUCache(maxsize=32)
+
+def _key_digest(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+def get_openai_client(api_key):
+    """Return the shared OpenAI client for this API key"""
+    cache_key = ('openai', _key_digest(api_key))
+    client = _SDK_CLIENTS.get(cache_key)
+    if client is None:
+        # Clear any existing OpenAI environment variables that might interfere
+        os.environ.pop('OPENAI_API_KEY', None)
+        os.environ.pop('OPENAI_API_BASE', None)
+        
+        client = openai.OpenAI(
+            api_key=api_key,
+            timeout=60,  # 60 second timeout
+            http_client=_HTTP_CLIENT,
+        )
+        _SDK_CLIENTS.set(cache_key, client)
+    return client
+
+# genai.configure() sets one process-wide key, which a GenerativeModel reads when it makes
+# its first call; holding this lock across configure and the call keeps each request on its own key
+_GEMINI_LOCK = threading.Lock()
+
+def get_anthropic_client(api_key):
+    """Return the shared Anthropic client for this API key"""
+    cache_key = ('anthropic', _key_digest(api_key))
+    client = _SDK_CLIENTS.get(cache_key)
+    if client is None:
+        client = Anthropic(api_key=api_key, http_client=_HTTP_CLIENT)
+        _SDK_CLIENTS.set(cache_key, client)
+    return client
 
 class LLMIntegration:
-    def __init__(self, api_key, provider='openai'):
+    def __init__(self, api_key, provider='openai', use_prompt_cache=True):
         self.api_key = api_key
         self.provider = provider.lower()
+        self.model = DEFAULT_MODELS.get(self.provider)
+        self.use_prompt_cache = use_prompt_cache
         # Validate API key before setup
         validate_api_key(api_key, self.provider)
         self._setup_client()
@@ -18,43 +243,86 @@ class LLMIntegration:
         """Initialize the appropriate LLM client"""
         try:
             if self.provider == 'openai':
-                # Clean initialization for OpenAI client
-                import os
-                # Clear any existing OpenAI environment variables that might interfere
-                os.environ.pop('OPENAI_API_KEY', None)
-                os.environ.pop('OPENAI_API_BASE', None)
-                
-                # Initialize client with minimal parameters
-                self.client = openai.OpenAI(
-                    api_key=self.api_key,
-                    timeout=60,  # 60 second timeout
-                )
+                self.client = get_openai_client(self.api_key)
             elif self.provider == 'anthropic':
-                self.client = Anthropic(api_key=self.api_key)
+                self.client = get_anthropic_client(self.api_key)
             elif self.provider == 'gemini':
-                genai.configure(api_key=self.api_key)
-                self.client = genai.GenerativeModel('gemini-pro')
+                # Configured per call in _call_gemini, since genai's key is process-wide
+                self.client = None
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
         except Exception as e:
             raise Exception(f"Failed to setup {self.provider} client: {str(e)}")
     
     @handle_llm_errors
-    def structure_text_to_slides(self, input_text, guidance=""):
+    def structure_text_to_slides(self, input_text, guidance="", no_cache=False):
         """
         Use LLM to analyze and structure input text into presentation slides
         Returns a structured format that can be used to generate PowerPoint
+        Identical (text, guidance, provider, model) requests are served from _SLIDE_CACHE unless no_cache is set
+        """
+        cache_key = _slide_cache_key(input_text, guidance, self.provider, self.model)
+        if not no_cache:
+            cached = _SLIDE_CACHE.get(cache_key)
+            if cached is not None:
+                logger.debug("♻️  Slide structure served from cache")
+                # Stored as JSON so callers can't mutate the cached copy
+                return json.loads(cached)
+        
+        chunks = _chunk_text(input_text)
+        if len(chunks) == 1:
+            slide_structure, parsed = self._structure_text_to_slides(input_text, guidance)
+        else:
+            slide_structure, parsed = self._structure_chunks(chunks, guidance)
+        # Fallback decks (unparseable LLM output) aren't cached, so the next request retries the LLM
+        if parsed and self._validate_structure(slide_structure):
+            _SLIDE_CACHE.set(cache_key, json.dumps(slide_structure))
+        return slide_structure
+    
+    def _structure_chunks(self, chunks, guidance):
+        """
+        Structure each part of a long input concurrently and merge the slides in order
+        Returns (structure, parsed) like _structure_text_to_slides; parsed only if every part parsed
+        """
+        total = len(chunks)
+        logger.info("✂️  Structuring long input as %d parts concurrently", total)
+        futures = [
+            _STRUCTURING_EXECUTOR.submit(
+                self._structure_text_to_slides,
+                chunk,
+                f"{guidance or DEFAULT_GUIDANCE}. This text is part {part} of {total} of a longer document; "
+                f"structure only this part and do not add an overall title or closing slide unless it is the first or last part."
+            )
+            for part, chunk in enumerate(chunks, 1)
+        ]
+        results = [future.result() for future in futures]
+        parts = [part for part, _ in results]
+        
+        slides = [slide for part in parts for slide in part.get('slides', [])]
+        for slide_number, slide in enumerate(slides, 1):
+            slide['slide_number'] = slide_number
+        
+        return {
+            'presentation_title': parts[0].get('presentation_title', 'Generated Presentation'),
+            'total_slides': len(slides),
+            'slides': slides
+        }, all(parsed for _, parsed in results)
+    
+    def _structure_text_to_slides(self, input_text, guidance):
+        """
+        Run the structuring prompt against the configured provider
+        Returns (structure, parsed): parsed is False when the structure is a fallback built from unparseable output
         """
         with RetryableOperation("LLM Text Structuring", RetryConfigs.LLM_API) as operation:
             prompt = self._create_structuring_prompt(input_text, guidance)
             
             def make_llm_call():
                 if self.provider == 'openai':
-                    response = self._call_openai(prompt)
+                    response = self._call_openai(prompt, STRUCTURING_SYSTEM_PROMPT, json_output=True, json_schema=SLIDE_STRUCTURE_SCHEMA)
                 elif self.provider == 'anthropic':
-                    response = self._call_anthropic(prompt)
+                    response = self._call_anthropic(prompt, STRUCTURING_SYSTEM_PROMPT, json_output=True)
                 elif self.provider == 'gemini':
-                    response = self._call_gemini(prompt)
+                    response = self._call_gemini(prompt, STRUCTURING_SYSTEM_PROMPT)
                 else:
                     raise LLMError(f"Unsupported provider: {self.provider}", error_code="INVALID_PROVIDER")
                 
@@ -63,176 +331,138 @@ class LLMIntegration:
             return operation.execute(make_llm_call)
     
     def _create_structuring_prompt(self, input_text, guidance):
-        """Create a comprehensive prompt for the LLM to structure the text"""
-        base_prompt = f"""
-You are an expert presentation designer. Your task is to analyze the provided text and structure it into an effective PowerPoint presentation.
-
+        """Create the per-request part of the structuring prompt (instructions live in STRUCTURING_SYSTEM_PROMPT)"""
+        return f"""
 Input Text:
 {input_text}
 
-Additional Guidance: {guidance if guidance else "Create a professional, well-structured presentation"}
-
-Please analyze this text and create a presentation structure with the following requirements:
-
-1. Determine the optimal number of slides (typically 5-15 slides)
-2. Create a logical flow and narrative
-3. Extract key points and organize them hierarchically
-4. Suggest appropriate slide titles
-5. Identify content that works best as bullet points vs. paragraphs
-6. Consider the audience and purpose based on the content
-
-Return your response as a JSON object with this exact structure:
-{{
-    "presentation_title": "Main title for the presentation",
-    "total_slides": number_of_slides,
-    "slides": [
-        {{
-            "slide_number": 1,
-            "title": "Slide Title",
-            "type": "content|bullet_points|conclusion",
-            "content": "Main content text or list of bullet points",
-            "speaker_notes": "Detailed speaker notes for this slide"
-        }}
-    ]
-}}
-
-CRITICAL formatting rules:
-- EVERY slide MUST have content - never leave "content" empty
-- For bullet points, use "content" as an array of strings (recommended for most slides)
-- For paragraph content, use "content" as a single string
-- Always include substantial content - aim for 2-5 bullet points or 50-200 words of text
-- EVERY slide MUST have speaker_notes - provide 2-4 sentences that expand on the slide content
-- Speaker notes should provide additional context, talking points, or presentation tips
-- Keep titles concise (max 8 words)
-- Ensure content is engaging and well-organized
-- Make sure the JSON is valid and properly formatted
-- DO NOT create title-only slides - every slide needs meaningful content and speaker notes
+Additional Guidance: {guidance if guidance else DEFAULT_GUIDANCE}
 
 Begin your analysis and structure the presentation:
 """
-        return base_prompt
     
-    def _call_openai(self, prompt):
-        """Call OpenAI API"""
+    def _call_openai(self, prompt, system_prompt=DEFAULT_SYSTEM_PROMPT, json_output=False, json_schema=None):
+        """
+        Call OpenAI API; json_output lowers temperature and enables JSON mode where the model supports it
+        json_schema switches models that support structured outputs to schema-constrained decoding
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        # OpenAI caches identical prompt prefixes automatically; the key routes
+        # requests sharing a system prompt to the same cache
+        extra_body = {"prompt_cache_key": self._prompt_cache_key(system_prompt)} if self.use_prompt_cache else None
+        temperature = JSON_TEMPERATURE if json_output else 0.7
+        # gpt-3.5-turbo, the fallback model, has JSON mode but not structured outputs
+        json_mode = {"response_format": {"type": "json_object"}} if json_output else {}
+        if json_schema and self.model.startswith(_STRUCTURED_OUTPUT_MODEL_PREFIXES):
+            response_format = {"response_format": {"type": "json_schema", "json_schema": json_schema}}
+        elif self.model.startswith(_JSON_MODE_MODEL_PREFIXES):
+            response_format = json_mode
+        else:
+            response_format = {}
         try:
-            print(f"Calling OpenAI API with model: gpt-4")
+            logger.debug("Calling OpenAI API with model: %s", self.model)
             response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert presentation designer who creates well-structured, engaging presentations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=2000,
+                extra_body=extra_body,
+                **response_format
             )
-            print(f"OpenAI API call successful")
+            logger.debug("OpenAI API call successful")
             return response.choices[0].message.content
         except Exception as e:
-            print(f"OpenAI API error details: {type(e).__name__}: {str(e)}")
+            logger.warning("OpenAI API error details: %s: %s", type(e).__name__, e)
             # Try with gpt-3.5-turbo as fallback
             if "gpt-4" in str(e).lower():
                 try:
-                    print("Trying fallback to gpt-3.5-turbo")
+                    logger.warning("Trying fallback to gpt-3.5-turbo")
                     response = self.client.chat.completions.create(
                         model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are an expert presentation designer who creates well-structured, engaging presentations."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=2000
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=2000,
+                        extra_body=extra_body,
+                        **json_mode
                     )
-                    print(f"Fallback API call successful")
+                    logger.debug("Fallback API call successful")
                     return response.choices[0].message.content
                 except Exception as fallback_e:
-                    print(f"Fallback also failed: {str(fallback_e)}")
+                    logger.error("Fallback also failed: %s", fallback_e)
                     raise e
             else:
                 raise e
     
-    def _call_anthropic(self, prompt):
-        """Call Anthropic Claude API"""
+    def _call_anthropic(self, prompt, system_prompt=DEFAULT_SYSTEM_PROMPT, json_output=False):
+        """Call Anthropic Claude API; json_output lowers temperature"""
+        if self.use_prompt_cache:
+            # Mark the static system prompt as a cacheable prefix
+            system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        else:
+            system = system_prompt
         try:
             response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
+                model=self.model,
                 max_tokens=2000,
-                temperature=0.7,
+                temperature=JSON_TEMPERATURE if json_output else 0.7,
+                system=system,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
             )
             return response.content[0].text
         except Exception as e:
-            print(f"Anthropic API error: {str(e)}")
+            logger.error("Anthropic API error: %s", e)
             raise e
     
-    def _call_gemini(self, prompt):
+    def _call_gemini(self, prompt, system_prompt=DEFAULT_SYSTEM_PROMPT):
         """Call Google Gemini API"""
         try:
-            response = self.client.generate_content(prompt)
+            with _GEMINI_LOCK:
+                genai.configure(api_key=self.api_key)
+                response = genai.GenerativeModel(self.model).generate_content(f"{system_prompt}\n{prompt}")
             return response.text
         except Exception as e:
-            print(f"Gemini API error: {str(e)}")
+            logger.error("Gemini API error: %s", e)
             raise e
     
+    def _prompt_cache_key(self, system_prompt):
+        """Stable cache key identifying a system prompt"""
+        return f"ppt-generator-{hashlib.blake2b(system_prompt.encode(), digest_size=8).hexdigest()}"
+    
     def _parse_llm_response(self, response):
-        """Parse LLM response and extract structured data"""
+        """
+        Parse LLM response and extract structured data
+        Returns (structure, parsed); parsed is False when a fallback structure had to be built
+        """
         try:
             # Try to find JSON in the response with robust parsing
             response = response.strip()
             
-            # Try multiple JSON extraction methods
-            json_candidates = []
-            
-            # Method 1: Find first complete JSON object
-            start_idx = response.find('{')
-            if start_idx != -1:
-                brace_count = 0
-                end_idx = start_idx
-                for i, char in enumerate(response[start_idx:], start_idx):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_idx = i + 1
-                            break
-                
-                if brace_count == 0:
-                    json_candidates.append(response[start_idx:end_idx])
-            
-            # Method 2: Fallback to simple find
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_candidates.append(response[start_idx:end_idx])
-            
-            # Try parsing each candidate
-            for json_str in json_candidates:
+            for json_str in _json_candidates(response):
                 try:
-                    # Clean up common JSON issues
-                    json_str = json_str.replace('\n', ' ').replace('\r', '')
-                    # Remove trailing commas before closing braces/brackets
-                    json_str = json_str.replace(',}', '}').replace(',]', ']')
-                    
-                    parsed = json.loads(json_str)
+                    parsed = _loads_json(json_str)
                     
                     # Validate structure
                     if self._validate_structure(parsed):
-                        print(f"✅ Successfully parsed slide structure JSON")
-                        return parsed
+                        logger.debug("✅ Successfully parsed slide structure JSON")
+                        return parsed, True
                 except json.JSONDecodeError as je:
-                    print(f"   JSON parse attempt failed: {str(je)}")
+                    logger.debug("JSON parse attempt failed: %s", je)
                     continue
             
-            # If JSON parsing fails, try to extract key information
-            print(f"❌ JSON parsing failed, using fallback extraction")
-            return self._extract_fallback_structure(response)
+            # If JSON parsing fails, try to extract key information; rare once the
+            # provider enforces JSON output, so make it visible when it happens
+            logger.warning("❌ JSON parsing failed, using fallback extraction")
+            return self._extract_fallback_structure(response), False
             
         except Exception as e:
-            print(f"Error parsing LLM response: {str(e)}")
-            print(f"Response preview: {response[:200]}...")
-            return self._create_fallback_structure(response)
+            logger.warning("Error parsing LLM response, using fallback structure: %s", e)
+            logger.debug("Response preview: %s...", response[:200])
+            return self._create_fallback_structure(response), False
     
     def _validate_structure(self, parsed):
         """Validate the parsed JSON structure"""
@@ -282,31 +512,28 @@ Begin your analysis and structure the presentation:
     
     def _create_fallback_structure(self, input_text):
         """Create a basic structure when LLM processing fails"""
-        # Split text into chunks
-        sentences = input_text.split('. ')
+        # Split text into sentences in one C-level pass; each keeps its own full stop
+        sentences = [sentence for sentence in _SENTENCE_BREAKS.split(input_text.strip()) if sentence]
         chunk_size = max(3, len(sentences) // 5)  # Aim for ~5 slides
         
-        slides = []
-        
         # Title slide
-        slides.append({
+        slides = [{
             'slide_number': 1,
             'title': 'Presentation Overview',
             'type': 'title_slide',
             'content': 'Generated from provided text content'
-        })
+        }]
         
         # Content slides
-        for i in range(0, len(sentences), chunk_size):
-            chunk = sentences[i:i+chunk_size]
-            slide_num = len(slides) + 1
-            
-            slides.append({
+        slides.extend(
+            {
                 'slide_number': slide_num,
                 'title': f'Key Points {slide_num - 1}',
                 'type': 'bullet_points',
-                'content': [sentence.strip() + '.' for sentence in chunk if sentence.strip()]
-            })
+                'content': sentences[i:i + chunk_size]
+            }
+            for slide_num, i in enumerate(range(0, len(sentences), chunk_size), 2)
+        )
         
         return {
             'presentation_title': 'Generated Presentation',
@@ -315,18 +542,21 @@ Begin your analysis and structure the presentation:
         }
     
     @handle_llm_errors
-    def generate_template_manifest(self, raw_template_data):
-        """Generate a structured template manifest using LLM analysis"""
+    def generate_template_manifest(self, raw_template_data, use_fallback=True):
+        """
+        Generate a structured template manifest using LLM analysis
+        With use_fallback=False, failures are raised instead of returning the fallback manifest
+        """
         with RetryableOperation("Template Manifest Generation", RetryConfigs.LLM_API) as operation:
             prompt = self._create_manifest_prompt(raw_template_data)
             
             def make_manifest_call():
                 if self.provider == 'openai':
-                    response = self._call_openai(prompt)
+                    response = self._call_openai(prompt, MANIFEST_SYSTEM_PROMPT, json_output=True)
                 elif self.provider == 'anthropic':
-                    response = self._call_anthropic(prompt)
+                    response = self._call_anthropic(prompt, MANIFEST_SYSTEM_PROMPT, json_output=True)
                 elif self.provider == 'gemini':
-                    response = self._call_gemini(prompt)
+                    response = self._call_gemini(prompt, MANIFEST_SYSTEM_PROMPT)
                 else:
                     raise LLMError(f"Unsupported provider: {self.provider}", error_code="INVALID_PROVIDER")
                 
@@ -335,53 +565,16 @@ Begin your analysis and structure the presentation:
             try:
                 return operation.execute(make_manifest_call)
             except Exception as e:
-                logger.warning(f"Manifest generation failed, using fallback: {str(e)}")
+                if not use_fallback:
+                    raise
+                logger.warning("Manifest generation failed, using fallback: %s", e)
                 return self._create_fallback_manifest(raw_template_data)
     
     def _create_manifest_prompt(self, raw_data):
-        """Create a prompt for template manifest generation"""
+        """Create the per-request part of the manifest prompt (instructions live in MANIFEST_SYSTEM_PROMPT)"""
         return f"""
-You are a presentation theme analyst. Convert raw PowerPoint template metadata into a clean manifest without inventing measurements. Preserve numeric geometry exactly.
-
 RAW_TEMPLATE:
-{json.dumps(raw_data, indent=2)}
-
-Produce JSON exactly matching this schema:
-{{
-  "slide_size": {{"width_emu": number, "height_emu": number}},
-  "theme": {{
-    "palette": {{"primary":"hex","secondary":"hex","accent":["hex"], "text":"hex","background":"hex"}},
-    "fonts": {{"title_family":"string","body_family":"string"}}
-  }},
-  "layouts": [
-    {{
-      "id":"string_slug",
-      "name":"string", 
-      "archetype":"title_only|title_content|two_content|section_header|other",
-      "placeholders":[{{"kind":"TITLE|BODY|PICTURE|FOOTER","left":num,"top":num,"width":num,"height":num}}]
-    }}
-  ],
-  "text_defaults": {{
-    "title":{{"family":"string","size_pt":number,"bold":true,"color":"palette_key"}},
-    "body":[{{"level":0,"family":"string","size_pt":number,"color":"palette_key"}}]
-  }},
-  "assets": [
-    {{"id":"logo_main","left":num,"top":num,"width":num,"height":num,"apply_on":"all|title_only|none"}}
-  ],
-  "rules": {{
-    "title_color":"palette_key",
-    "body_color":"palette_key", 
-    "logo_policy":"string description"
-  }}
-}}
-
-Constraints:
-- Do not change numeric geometry values
-- Map theme colors into palette keys but keep original hexes  
-- Infer layout archetypes from placeholder sets and names
-- For text_defaults, suggest reasonable font sizes (title: 28-36pt, body: 16-20pt)
-- If images exist, classify as logos vs decorative and set apply_on appropriately
-- Return only valid JSON, no explanatory text
+{json.dumps(raw_data, separators=(',', ':'))}
 
 Begin analysis:
 """
@@ -392,53 +585,21 @@ Begin analysis:
             # Extract JSON from response
             response = response.strip()
             
-            # Try multiple JSON extraction methods
-            json_candidates = []
-            
-            # Method 1: Find first complete JSON object
-            start_idx = response.find('{')
-            if start_idx != -1:
-                brace_count = 0
-                end_idx = start_idx
-                for i, char in enumerate(response[start_idx:], start_idx):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_idx = i + 1
-                            break
-                
-                if brace_count == 0:
-                    json_candidates.append(response[start_idx:end_idx])
-            
-            # Method 2: Fallback to simple find
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_candidates.append(response[start_idx:end_idx])
-            
-            # Try parsing each candidate
-            for json_str in json_candidates:
+            for json_str in _json_candidates(response):
                 try:
-                    # Clean up common JSON issues
-                    json_str = json_str.replace('\n', ' ').replace('\r', '')
-                    # Remove trailing commas before closing braces/brackets
-                    json_str = json_str.replace(',}', '}').replace(',]', ']')
-                    
-                    parsed = json.loads(json_str)
-                    print(f"✅ Successfully parsed manifest JSON")
+                    parsed = _loads_json(json_str)
+                    logger.debug("✅ Successfully parsed manifest JSON")
                     return parsed
                 except json.JSONDecodeError as je:
-                    print(f"   JSON parse attempt failed: {str(je)}")
+                    logger.debug("JSON parse attempt failed: %s", je)
                     continue
             
-            print(f"❌ All JSON parsing attempts failed, using fallback manifest")
+            logger.warning("❌ All JSON parsing attempts failed, using fallback manifest")
             raise ValueError("No valid JSON found in response")
             
         except Exception as e:
-            print(f"Error parsing manifest response: {str(e)}")
-            print(f"Response preview: {response[:200]}...")
+            logger.warning("Error parsing manifest response: %s", e)
+            logger.debug("Response preview: %.200s...", response)
             raise e
     
     def _create_fallback_manifest(self, raw_data):
@@ -492,6 +653,25 @@ Provide 2-3 sentences of speaking points that expand on the slide content.
             return response.strip()
             
         except Exception as e:
-            print(f"Error generating speaker notes: {str(e)}")
+            logger.warning("Error generating speaker notes: %s", e)
             return "Speaker notes could not be generated."
 
+# (provider, api_key_hash, use_prompt_cache) -> LLMIntegration, so each key keeps its client's connection pool
+_INTEGRATION_CACHE = LRUCache(maxsize=32)
+
+# sha256(input_text, guidance, provider, model) -> slide structure JSON, kept for 24 hours
+_SLIDE_CACHE = LRUCache(maxsize=256, ttl=24 * 60 * 60)
+
+def _slide_cache_key(input_text, guidance, provider, model):
+    """Hash the inputs that determine the structuring response"""
+    return hashlib.sha256("\x00".join((input_text, guidance, provider, model)).encode()).hexdigest()
+
+def get_llm_integration(api_key, provider='openai', use_prompt_cache=True):
+    """Return a shared LLMIntegration for this provider/API key, creating it on first use"""
+    provider = provider.lower()
+    cache_key = (provider, _key_digest(api_key), use_prompt_cache)
+    integration = _INTEGRATION_CACHE.get(cache_key)
+    if integration is None:
+        integration = LLMIntegration(api_key, provider, use_prompt_cache=use_prompt_cache)
+        _INTEGRATION_CACHE.set(cache_key, integration)
+    return integration
@@ -1,16 +1,48 @@
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
+from pptx.enum.dml import MSO_COLOR_TYPE
 from pptx.dml.color import RGBColor
+from pptx.oxml.ns import qn
+from lxml import etree
 import os
+import re
+import shutil
 import tempfile
+import uuid
 import json
-from PIL import Image
 import io
 
+# XML-illegal control characters, escaped the same way python-pptx escapes run text
+_CTRL_CHARS = re.compile(r"[\x00-\x08\x0B-\x1F]")
+
 class PPTProcessor:
     def __init__(self):
-        self.temp_dir = tempfile.mkdtemp()
+        # Created on first use; analysis-only instances never need a directory
+        self._temp_dir = None
+        # (abspath, mtime) -> Presentation parsed by analyze_template, handed to the next generate_presentation
+        self._prs_cache = {}
+        # (template key, bytes) of the last template read, so reloading it skips the disk
+        self._template_bytes = None
+    
+    @property
+    def temp_dir(self):
+        """Directory for generated files, created when first needed"""
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp()
+        return self._temp_dir
+    
+    def _template_key(self, template_path):
+        """Identify a template file version by path and modification time"""
+        return (os.path.abspath(template_path), os.path.getmtime(template_path))
+    
+    def _load_template(self, template_path):
+        """Parse the template from an in-memory copy, reading the file from disk once per version"""
+        key = self._template_key(template_path)
+        if self._template_bytes is None or self._template_bytes[0] != key:
+            with open(template_path, 'rb') as f:
+                self._template_bytes = (key, f.read())
+        return Presentation(io.BytesIO(self._template_bytes[1]))
     
     def analyze_template(self, template_path):
         """
@@ -22,10 +54,15 @@ class PPTProcessor:
         - Master slide properties
         """
         try:
-            prs = Presentation(template_path)
+            prs = self._load_template(template_path)
+            # Analysis only reads the presentation, so generate_presentation can build on it
+            # instead of parsing the same file again; keep just the latest template
+            self._prs_cache = {self._template_key(template_path): prs}
             analysis = {
                 'layouts': [],
                 'colors': [],
+                # RGBColor for each entry of 'colors', so formatting doesn't reparse hex per run
+                'rgb_objects': [],
                 'fonts': [],
                 'images': [],
                 'slide_dimensions': {
@@ -58,9 +95,15 @@ class PPTProcessor:
                 
                 analysis['layouts'].append(layout_info)
             
-            # Analyze existing slides for styling
+            # Analyze existing slides for styling; the same logo usually repeats on
+            # many slides, so images are keyed by content hash and kept once, and
+            # fonts/colors already collected are tracked in sets rather than
+            # rescanning the output lists for every run
+            seen = {'images': set(), 'fonts': set(), 'colors': set()}
             for slide in prs.slides:
-                self._extract_slide_styles(slide, analysis)
+                if self._styles_saturated(analysis):
+                    break
+                self._extract_slide_styles(slide, analysis, seen)
             
             # Extract theme colors from master slides
             for master in prs.slide_masters:
@@ -73,36 +116,52 @@ class PPTProcessor:
             print(f"Error analyzing template: {str(e)}")
             return self._get_default_analysis()
     
-    def _extract_slide_styles(self, slide, analysis):
+    def _styles_saturated(self, analysis):
+        """Whether enough fonts, colors and images are collected; generation only uses the first few"""
+        return len(analysis['fonts']) >= 3 and len(analysis['colors']) >= 6 and len(analysis['images']) >= 1
+    
+    def _extract_slide_styles(self, slide, analysis, seen):
         """Extract styling information from individual slides"""
         for shape in slide.shapes:
-            # Extract text formatting
-            if hasattr(shape, 'text_frame'):
+            # Extract text formatting (empty frames, e.g. unfilled placeholders, have no runs to read)
+            if shape.has_text_frame and shape.text_frame.text:
                 for paragraph in shape.text_frame.paragraphs:
                     for run in paragraph.runs:
-                        if run.font.name and run.font.name not in analysis['fonts']:
-                            analysis['fonts'].append({
-                                'name': run.font.name,
-                                'size': run.font.size.pt if run.font.size else 18,
-                                'bold': run.font.bold,
-                                'italic': run.font.italic
-                            })
+                        font = run.font
+                        if font.name:
+                            font_key = (font.name, font.size.pt if font.size else 18, font.bold, font.italic)
+                            if font_key not in seen['fonts']:
+                                seen['fonts'].add(font_key)
+                                analysis['fonts'].append({
+                                    'name': font_key[0],
+                                    'size': font_key[1],
+                                    'bold': font_key[2],
+                                    'italic': font_key[3]
+                                })
                         
-                        # Extract colors
-                        if run.font.color.rgb:
-                            color = f"#{run.font.color.rgb:06x}"
-                            if color not in analysis['colors']:
+                        # Extract colors (only explicit RGB ones carry a value to read)
+                        if font.color.type == MSO_COLOR_TYPE.RGB:
+                            rgb = font.color.rgb
+                            color = f"#{str(rgb).lower()}"
+                            if color not in seen['colors']:
+                                seen['colors'].add(color)
                                 analysis['colors'].append(color)
+                                analysis['rgb_objects'].append(rgb)
             
             # Extract images
             if shape.shape_type == 13:  # Picture shape type
                 try:
+                    image = shape.image
+                    if image.sha1 in seen['images']:
+                        continue
+                    seen['images'].add(image.sha1)
                     image_data = {
+                        'hash': image.sha1,
                         'left': shape.left,
                         'top': shape.top,
                         'width': shape.width,
                         'height': shape.height,
-                        'image_data': shape.image.blob
+                        'image_data': image.blob
                     }
                     analysis['images'].append(image_data)
                 except:
@@ -132,9 +191,11 @@ class PPTProcessor:
     
     def _get_default_analysis(self):
         """Fallback analysis if template analysis fails"""
+        colors = ['#1f4e79', '#ffffff', '#000000', '#4472c4']
         return {
             'layouts': [],
-            'colors': ['#1f4e79', '#ffffff', '#000000', '#4472c4'],
+            'colors': colors,
+            'rgb_objects': [RGBColor.from_string(c[1:]) for c in colors],
             'fonts': [{'name': 'Calibri', 'size': 18, 'bold': False, 'italic': False}],
             'images': [],
             'slide_dimensions': {'width': Inches(10), 'height': Inches(7.5)},
@@ -149,22 +210,32 @@ class PPTProcessor:
         - template_path: Original template file for layout copying
         """
         try:
-            # Load the template as base
-            prs = Presentation(template_path)
+            # Load the template as base, reusing the copy analyze_template parsed; it is
+            # modified below, so take it out of the cache
+            prs = self._prs_cache.pop(self._template_key(template_path), None)
+            if prs is None:
+                prs = self._load_template(template_path)
             
-            # Clear existing slides but keep master
-            slide_idxs = list(range(len(prs.slides) - 1, -1, -1))
-            for i in slide_idxs:
-                rId = prs.slides._sldIdLst[i].rId
-                prs.part.drop_rel(rId)
-                del prs.slides._sldIdLst[i]
+            # Clear existing slides but keep master; drop_rel() rescans the presentation XML
+            # on every call, so empty the slide list in one go and pop the now unreferenced
+            # relationships directly
+            sld_id_lst = prs.slides._sldIdLst
+            rIds = [sld_id.rId for sld_id in sld_id_lst]
+            sld_id_lst.clear()
+            referenced = set(prs.part._element.xpath('//@r:id'))
+            for rId in rIds:
+                if rId not in referenced:
+                    prs.part.rels.pop(rId)
             
-            # Generate slides based on structure
+            # Generate slides based on structure; the layout choice depends only on the
+            # template, so work it out once for the whole deck
+            layout_hint = self._plan_layouts(template_analysis)
             for slide_content in slide_structure.get('slides', []):
-                self._create_slide(prs, slide_content, template_analysis)
+                self._create_slide(prs, slide_content, template_analysis, layout_hint)
             
-            # Save the new presentation
-            output_path = os.path.join(self.temp_dir, 'generated_presentation.pptx')
+            # Save the new presentation under a name of its own, so successive or concurrent
+            # generations don't overwrite each other's output
+            output_path = os.path.join(self.temp_dir, f'generated_presentation_{uuid.uuid4().hex}.pptx')
             prs.save(output_path)
             
             return output_path
@@ -173,33 +244,34 @@ class PPTProcessor:
             print(f"Error generating presentation: {str(e)}")
             raise e
     
-    def _create_slide(self, prs, slide_content, template_analysis):
+    def _create_slide(self, prs, slide_content, template_analysis, layout_hint):
         """Create a single slide with the given content"""
         try:
             # Choose appropriate layout based on content type
-            layout_idx = self._choose_layout(slide_content, template_analysis)
+            layout_idx = self._choose_layout(slide_content, layout_hint)
             layout = prs.slide_layouts[layout_idx] if layout_idx < len(prs.slide_layouts) else prs.slide_layouts[0]
             
             slide = prs.slides.add_slide(layout)
+            # Assign new shape ids incrementally instead of rescanning the slide on every add
+            slide.shapes.turbo_add_enabled = True
             
-            # Add title
-            if 'title' in slide_content and slide.shapes.title:
-                slide.shapes.title.text = slide_content['title']
-                self._apply_text_formatting(slide.shapes.title, template_analysis, is_title=True)
+            # Add title (shapes.title searches the placeholders on every access, so look it up once)
+            title_shape = slide.shapes.title
+            if 'title' in slide_content and title_shape:
+                title_shape.text = slide_content['title']
+                self._apply_text_formatting(title_shape, template_analysis, is_title=True)
             
-            # Add content
-            content_shapes = [shape for shape in slide.shapes if shape.has_text_frame and shape != slide.shapes.title]
+            # Add content to the first non-title text shape
+            content_shape = None
+            for shape in slide.shapes:
+                if shape.has_text_frame and shape != title_shape:
+                    content_shape = shape
+                    break
             
-            if 'content' in slide_content and content_shapes:
-                content_shape = content_shapes[0]
-                
+            if 'content' in slide_content and content_shape is not None:
                 if isinstance(slide_content['content'], list):
                     # Bullet points
-                    content_shape.text = ""
-                    for i, point in enumerate(slide_content['content']):
-                        p = content_shape.text_frame.add_paragraph() if i > 0 else content_shape.text_frame.paragraphs[0]
-                        p.text = point
-                        p.level = 0
+                    self._set_bullets(content_shape.text_frame, slide_content['content'])
                 else:
                     # Regular text
                     content_shape.text = slide_content['content']
@@ -212,22 +284,43 @@ class PPTProcessor:
         except Exception as e:
             print(f"Error creating slide: {str(e)}")
     
-    def _choose_layout(self, slide_content, template_analysis):
-        """Choose the most appropriate layout for the content"""
+    def _set_bullets(self, text_frame, points):
+        """Replace the text frame content with one level-0 paragraph per point, built as XML in one batch"""
+        txBody = text_frame._txBody
+        txBody.clear_content()
+        
+        # A txBody needs at least one paragraph, so an empty list still gets an empty one
+        for point in points or ['']:
+            p = txBody.add_p()
+            if not point:
+                continue
+            r = etree.SubElement(p, qn('a:r'))
+            etree.SubElement(r, qn('a:t')).text = _CTRL_CHARS.sub(lambda m: "_x%04X_" % ord(m.group()), point)
+    
+    def _plan_layouts(self, template_analysis):
+        """Pick the layout index for bullet slides and for everything else, once per template"""
         layouts = template_analysis.get('layouts', [])
         
         if not layouts:
-            return 0  # Default to first layout
+            return {'bullet': 0, 'default': 0}  # Default to first layout
         
+        # Default to title and content layout (usually index 1)
+        default_idx = min(1, len(layouts) - 1)
+        
+        # Bullet points - prefer layouts with content placeholders
+        bullet_idx = next(
+            (i for i, layout in enumerate(layouts)
+             if any('CONTENT' in p.get('type', '') for p in layout.get('placeholders', []))),
+            default_idx
+        )
+        return {'bullet': bullet_idx, 'default': default_idx}
+    
+    def _choose_layout(self, slide_content, layout_hint):
+        """Choose the most appropriate layout for the content"""
         # Simple heuristic: choose based on content type
         if 'content' in slide_content and isinstance(slide_content['content'], list):
-            # Bullet points - prefer layouts with content placeholders
-            for i, layout in enumerate(layouts):
-                if any('CONTENT' in p.get('type', '') for p in layout.get('placeholders', [])):
-                    return i
-        
-        # Default to title and content layout (usually index 1)
-        return min(1, len(layouts) - 1)
+            return layout_hint['bullet']
+        return layout_hint['default']
     
     def _apply_text_formatting(self, shape, template_analysis, is_title=False):
         """Apply template-based formatting to text"""
@@ -235,7 +328,7 @@ class PPTProcessor:
             return
         
         fonts = template_analysis.get('fonts', [])
-        colors = template_analysis.get('colors', [])
+        rgb_objects = template_analysis.get('rgb_objects', [])
         
         for paragraph in shape.text_frame.paragraphs:
             for run in paragraph.runs:
@@ -252,14 +345,8 @@ class PPTProcessor:
                         run.font.bold = font_info.get('bold', False)
                 
                 # Apply color
-                if colors and len(colors) > 1:
-                    color_hex = colors[1 if is_title else 0].replace('#', '')
-                    if len(color_hex) == 6:
-                        try:
-                            rgb = tuple(int(color_hex[i:i+2], 16) for i in (0, 2, 4))
-                            run.font.color.rgb = RGBColor(*rgb)
-                        except:
-                            pass
+                if len(rgb_objects) > 1:
+                    run.font.color.rgb = rgb_objects[1 if is_title else 0]
     
     def _add_template_images(self, slide, template_analysis):
         """Add images from the template to appropriate positions"""
@@ -283,9 +370,11 @@ class PPTProcessor:
     
     def cleanup(self):
         """Clean up temporary files"""
+        if self._temp_dir is None:
+            return
         try:
-            import shutil
-            shutil.rmtree(self.temp_dir)
-        except:
-            pass
+            shutil.rmtree(self._temp_dir)
+        except OSError as e:
+            print(f"Error removing temp dir: {str(e)}")
+        self._temp_dir = None
 
@@ -5,11 +5,28 @@ import time
 import random
 import asyncio
 import logging
-from functools import wraps
+import threading
+from functools import wraps, partial
 from typing import Callable, Any, Optional, List
 
 logger = logging.getLogger(__name__)
 
+# Lowercase message fragments that mark an error as transient
+RETRYABLE_CONDITIONS = (
+    'timeout',
+    'connection',
+    'network',
+    'temporary',
+    'rate limit',
+    'server error',
+    '503',
+    '502',
+    '504',
+    'internal server error',
+    'service unavailable',
+    'too many requests'
+)
+
 class RetryConfig:
     """Configuration for retry behavior"""
     def __init__(
@@ -31,45 +48,52 @@ class RetryConfig:
             TimeoutError,
             Exception  # Generic exception for now, will be more specific in practice
         ]
+        # Fixed per config, so work them out once instead of on every failure
+        self._retryable_types = tuple(self.retryable_errors)
+        self._delay_schedule = [
+            min(base_delay * (exponential_factor ** attempt), max_delay)
+            for attempt in range(max_retries + 1)
+        ]
 
 def calculate_delay(attempt: int, config: RetryConfig) -> float:
     """Calculate delay for next retry attempt"""
-    delay = config.base_delay * (config.exponential_factor ** attempt)
-    delay = min(delay, config.max_delay)
+    if attempt < len(config._delay_schedule):
+        delay = config._delay_schedule[attempt]
+    else:
+        delay = min(config.base_delay * (config.exponential_factor ** attempt), config.max_delay)
     
     if config.jitter:
         # Add random jitter (±25%)
-        jitter_range = delay * 0.25
-        delay += random.uniform(-jitter_range, jitter_range)
+        delay *= 1.0 + (random.random() - 0.5) * 0.5
     
     return max(0, delay)
 
 def is_retryable_error(error: Exception, config: RetryConfig) -> bool:
     """Check if error is retryable"""
-    error_message = str(error).lower()
-    
-    # Check for specific retryable conditions
-    retryable_conditions = [
-        'timeout',
-        'connection',
-        'network',
-        'temporary',
-        'rate limit',
-        'server error',
-        '503',
-        '502',
-        '504',
-        'internal server error',
-        'service unavailable',
-        'too many requests'
-    ]
+    # Check if error type is in retryable list (one isinstance call against the tuple)
+    if isinstance(error, config._retryable_types):
+        return True
     
     # Check if error message contains retryable conditions
-    if any(condition in error_message for condition in retryable_conditions):
-        return True
+    error_message = str(error).lower()
+    return any(condition in error_message for condition in RETRYABLE_CONDITIONS)
+
+def _next_retry_delay(attempt: int, error: Exception, config: RetryConfig, label: str, log_exhausted: bool = True) -> Optional[float]:
+    """Decide what follows a failed attempt: the delay before retrying, or None to give up"""
+    # Don't retry on last attempt
+    if attempt == config.max_retries:
+        if log_exhausted:
+            logger.error("❌ %s failed after %d attempts: %s", label, config.max_retries + 1, error)
+        return None
+    
+    # Check if error is retryable
+    if not is_retryable_error(error, config):
+        logger.error("❌ %s failed with non-retryable error: %s", label, error)
+        return None
     
-    # Check if error type is in retryable list
-    return any(isinstance(error, error_type) for error_type in config.retryable_errors)
+    delay = calculate_delay(attempt, config)
+    logger.warning("⚠️  %s failed on attempt %d, retrying in %.1fs: %s", label, attempt + 1, delay, error)
+    return delay
 
 def retry_with_backoff(config: Optional[RetryConfig] = None):
     """Decorator for adding retry logic with exponential backoff"""
@@ -85,25 +109,14 @@ def retry_with_backoff(config: Optional[RetryConfig] = None):
                 try:
                     result = func(*args, **kwargs)
                     if attempt > 0:
-                        logger.info(f"✅ Function {func.__name__} succeeded on attempt {attempt + 1}")
+                        logger.info("✅ Function %s succeeded on attempt %d", func.__name__, attempt + 1)
                     return result
                     
                 except Exception as e:
                     last_exception = e
-                    
-                    # Don't retry on last attempt
-                    if attempt == config.max_retries:
-                        logger.error(f"❌ Function {func.__name__} failed after {config.max_retries + 1} attempts: {str(e)}")
+                    delay = _next_retry_delay(attempt, e, config, f"Function {func.__name__}")
+                    if delay is None:
                         break
-                    
-                    # Check if error is retryable
-                    if not is_retryable_error(e, config):
-                        logger.error(f"❌ Function {func.__name__} failed with non-retryable error: {str(e)}")
-                        break
-                    
-                    # Calculate delay and wait
-                    delay = calculate_delay(attempt, config)
-                    logger.warning(f"⚠️  Function {func.__name__} failed on attempt {attempt + 1}, retrying in {delay:.1f}s: {str(e)}")
                     time.sleep(delay)
             
             # Re-raise the last exception
@@ -112,7 +125,7 @@ def retry_with_backoff(config: Optional[RetryConfig] = None):
         return wrapper
     return decorator
 
-async def async_retry_with_backoff(config: Optional[RetryConfig] = None):
+def async_retry_with_backoff(config: Optional[RetryConfig] = None):
     """Async version of retry decorator"""
     if config is None:
         config = RetryConfig()
@@ -127,28 +140,20 @@ async def async_retry_with_backoff(config: Optional[RetryConfig] = None):
                     if asyncio.iscoroutinefunction(func):
                         result = await func(*args, **kwargs)
                     else:
-                        result = func(*args, **kwargs)
+                        # Run blocking calls (e.g. sync HTTP clients) in the default executor
+                        # so the event loop keeps serving other coroutines meanwhile
+                        loop = asyncio.get_running_loop()
+                        result = await loop.run_in_executor(None, partial(func, *args, **kwargs))
                     
                     if attempt > 0:
-                        logger.info(f"✅ Async function {func.__name__} succeeded on attempt {attempt + 1}")
+                        logger.info("✅ Async function %s succeeded on attempt %d", func.__name__, attempt + 1)
                     return result
                     
                 except Exception as e:
                     last_exception = e
-                    
-                    # Don't retry on last attempt
-                    if attempt == config.max_retries:
-                        logger.error(f"❌ Async function {func.__name__} failed after {config.max_retries + 1} attempts: {str(e)}")
-                        break
-                    
-                    # Check if error is retryable
-                    if not is_retryable_error(e, config):
-                        logger.error(f"❌ Async function {func.__name__} failed with non-retryable error: {str(e)}")
+                    delay = _next_retry_delay(attempt, e, config, f"Async function {func.__name__}")
+                    if delay is None:
                         break
-                    
-                    # Calculate delay and wait
-                    delay = calculate_delay(attempt, config)
-                    logger.warning(f"⚠️  Async function {func.__name__} failed on attempt {attempt + 1}, retrying in {delay:.1f}s: {str(e)}")
                     await asyncio.sleep(delay)
             
             # Re-raise the last exception
@@ -202,15 +207,15 @@ class RetryableOperation:
         
     def __enter__(self):
         self.start_time = time.time()
-        logger.info(f"🚀 Starting retryable operation: {self.operation_name}")
+        logger.info("🚀 Starting retryable operation: %s", self.operation_name)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         elapsed = time.time() - self.start_time
         if exc_type is None:
-            logger.info(f"✅ Operation {self.operation_name} completed successfully in {elapsed:.1f}s after {self.attempt + 1} attempt(s)")
+            logger.info("✅ Operation %s completed successfully in %.1fs after %d attempt(s)", self.operation_name, elapsed, self.attempt + 1)
         else:
-            logger.error(f"❌ Operation {self.operation_name} failed after {elapsed:.1f}s and {self.attempt + 1} attempt(s): {exc_val}")
+            logger.error("❌ Operation %s failed after %.1fs and %d attempt(s): %s", self.operation_name, elapsed, self.attempt + 1, exc_val)
     
     def execute(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with retry logic"""
@@ -221,24 +226,15 @@ class RetryableOperation:
             try:
                 result = func(*args, **kwargs)
                 if attempt > 0:
-                    logger.info(f"✅ Operation {self.operation_name} succeeded on attempt {attempt + 1}")
+                    logger.info("✅ Operation %s succeeded on attempt %d", self.operation_name, attempt + 1)
                 return result
                 
             except Exception as e:
                 last_exception = e
-                
-                # Don't retry on last attempt
-                if attempt == self.config.max_retries:
-                    break
-                
-                # Check if error is retryable
-                if not is_retryable_error(e, self.config):
-                    logger.error(f"❌ Operation {self.operation_name} failed with non-retryable error: {str(e)}")
+                # __exit__ reports the final failure, so don't log exhaustion here too
+                delay = _next_retry_delay(attempt, e, self.config, f"Operation {self.operation_name}", log_exhausted=False)
+                if delay is None:
                     break
-                
-                # Calculate delay and wait
-                delay = calculate_delay(attempt, self.config)
-                logger.warning(f"⚠️  Operation {self.operation_name} failed on attempt {attempt + 1}, retrying in {delay:.1f}s: {str(e)}")
                 time.sleep(delay)
         
         # Re-raise the last exception
@@ -267,39 +263,45 @@ class CircuitBreaker:
         self.failure_count = 0
         self.last_failure_time = None
         self.state = 'CLOSED'  # CLOSED, OPEN, HALF_OPEN
+        # Guards state transitions; a shared breaker is hit from several request threads
+        self._lock = threading.Lock()
     
     def is_available(self) -> bool:
         """Check if circuit breaker allows requests"""
+        # Common case needs no lock: a closed breaker always allows the request
         if self.state == 'CLOSED':
             return True
-        elif self.state == 'OPEN':
-            if self.last_failure_time and time.time() - self.last_failure_time > self.recovery_timeout:
-                self.state = 'HALF_OPEN'
-                logger.info("🔄 Circuit breaker entering HALF_OPEN state")
-                return True
-            return False
-        elif self.state == 'HALF_OPEN':
-            return True
-        return False
+        
+        with self._lock:
+            state = self.state
+            if state == 'OPEN':
+                if self.last_failure_time and time.time() - self.last_failure_time > self.recovery_timeout:
+                    self.state = 'HALF_OPEN'
+                    logger.info("🔄 Circuit breaker entering HALF_OPEN state")
+                    return True
+                return False
+            return state in ('CLOSED', 'HALF_OPEN')
     
     def record_success(self):
         """Record successful operation"""
-        if self.state == 'HALF_OPEN':
-            self.state = 'CLOSED'
-            self.failure_count = 0
-            logger.info("✅ Circuit breaker reset to CLOSED state")
+        with self._lock:
+            if self.state == 'HALF_OPEN':
+                self.state = 'CLOSED'
+                self.failure_count = 0
+                logger.info("✅ Circuit breaker reset to CLOSED state")
     
     def record_failure(self):
         """Record failed operation"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        
-        if self.failure_count >= self.failure_threshold and self.state == 'CLOSED':
-            self.state = 'OPEN'
-            logger.warning(f"🚫 Circuit breaker OPENED after {self.failure_count} failures")
-        elif self.state == 'HALF_OPEN':
-            self.state = 'OPEN'
-            logger.warning("🚫 Circuit breaker returned to OPEN state from HALF_OPEN")
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            
+            if self.failure_count >= self.failure_threshold and self.state == 'CLOSED':
+                self.state = 'OPEN'
+                logger.warning("🚫 Circuit breaker OPENED after %d failures", self.failure_count)
+            elif self.state == 'HALF_OPEN':
+                self.state = 'OPEN'
+                logger.warning("🚫 Circuit breaker returned to OPEN state from HALF_OPEN")
     
     def __call__(self, func: Callable) -> Callable:
         """Decorator to apply circuit breaker pattern"""
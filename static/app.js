@@ -224,7 +224,6 @@ async function handleFormSubmit(e) {
         const formData = new FormData();
         formData.append('text', inputText.value.trim());
         formData.append('guidance', guidance.value.trim());
-        formData.append('api_key', apiKey.value.trim());
         formData.append('llm_provider', llmProvider.value);
         formData.append('include_speaker_notes', document.getElementById('includeSpeakerNotes').checked);
         formData.append('template', templateFile.files[0]);
@@ -241,6 +240,7 @@ async function handleFormSubmit(e) {
         try {
             const response = await fetch(`${API_BASE_URL}/generate-presentation-with-preview`, {
                 method: 'POST',
+                headers: { 'X-Api-Key': apiKey.value.trim() },
                 body: formData
             });
             
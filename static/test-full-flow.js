@@ -288,11 +288,11 @@ async function handleFormSubmit(e) {
         return;
     }
     
+    const apiKey = document.getElementById('apiKey').value.trim();
     const formData = new FormData();
     formData.append('template', templateFile.files[0]);
     formData.append('text', document.getElementById('inputText').value.trim());
     formData.append('guidance', document.getElementById('guidance').value.trim());
-    formData.append('api_key', document.getElementById('apiKey').value.trim());
     formData.append('llm_provider', document.getElementById('llmProvider').value);
     formData.append('include_speaker_notes', document.getElementById('includeSpeakerNotes').checked);
     
@@ -301,7 +301,7 @@ async function handleFormSubmit(e) {
         return;
     }
     
-    if (!formData.get('api_key')) {
+    if (!apiKey) {
         showError('Please enter your API key');
         return;
     }
@@ -314,6 +314,7 @@ async function handleFormSubmit(e) {
         
         const response = await fetch(`${API_BASE_URL}/generate-presentation-with-preview`, {
             method: 'POST',
+            headers: { 'X-Api-Key': apiKey },
             body: formData
         });
         
@@ -155,7 +155,6 @@ async function handleFormSubmit(e) {
     
     const formData = new FormData();
     formData.append('template', file);
-    formData.append('api_key', apiKey);
     formData.append('llm_provider', llmProvider);
     
     try {
@@ -163,6 +162,7 @@ async function handleFormSubmit(e) {
         
         const response = await fetch(`${API_BASE_URL}/generate-manifest`, {
             method: 'POST',
+            headers: { 'X-Api-Key': apiKey },
             body: formData
         });
         
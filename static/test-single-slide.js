@@ -122,10 +122,10 @@ function formatFileSize(bytes) {
 async function handleFormSubmit(e) {
     e.preventDefault();
     
+    const apiKey = document.getElementById('apiKey').value.trim();
     const formData = new FormData();
     formData.append('template', templateFile.files[0]);
     formData.append('text', document.getElementById('inputText').value.trim());
-    formData.append('api_key', document.getElementById('apiKey').value.trim());
     formData.append('llm_provider', document.getElementById('llmProvider').value);
     
     if (!formData.get('template')) {
@@ -138,7 +138,7 @@ async function handleFormSubmit(e) {
         return;
     }
     
-    if (!formData.get('api_key')) {
+    if (!apiKey) {
         showError('Please enter your API key');
         return;
     }
@@ -151,6 +151,7 @@ async function handleFormSubmit(e) {
         
         const response = await fetch(`${API_BASE_URL}/test-single-slide`, {
             method: 'POST',
+            headers: { 'X-Api-Key': apiKey },
             body: formData
         });
         
@@ -0,0 +1,33 @@
+"""
+Tests for the request hooks in app
+Run with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as appmod
+
+class RejectBadUploadsTest(unittest.TestCase):
+    def setUp(self):
+        self.client = appmod.app.test_client()
+
+    def test_cors_preflight_passes(self):
+        response = self.client.options('/api/generate-manifest', headers={
+            'Origin': 'http://localhost:3000',
+            'Access-Control-Request-Method': 'POST',
+            'Access-Control-Request-Headers': 'x-api-key',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('x-api-key', response.headers.get('Access-Control-Allow-Headers', '').lower())
+
+    def test_non_multipart_post_rejected(self):
+        response = self.client.post('/api/generate-manifest', data='x', content_type='text/plain')
+
+        self.assertEqual(response.status_code, 415)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests for body text styling and placing manifest assets in ImprovedPPTProcessor
+Run with: python -m unittest discover -s tests
+"""
+import io
+import os
+import sys
+import unittest
+
+from lxml import etree
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.util import Inches
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from improved_ppt_processor import ImprovedPPTProcessor
+
+SLIDES = {
+    "presentation_title": "Deck",
+    "slides": [{"title": f"Slide {i}", "content": ["a", "b"]} for i in range(3)]
+}
+
+def make_template():
+    """One-slide template with a logo picture as shape 0"""
+    image = io.BytesIO()
+    Image.new('RGB', (16, 16), 'red').save(image, 'PNG')
+    image.seek(0)
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide.shapes.add_picture(image, 0, 0, Inches(1))
+    return prs
+
+def make_manifest(assets):
+    return {
+        "layouts": [{"id": "tc", "name": "Title and Content", "archetype": "title_content"}],
+        "assets": assets
+    }
+
+def pictures(slide):
+    return [shape for shape in slide.shapes if shape.shape_type == MSO_SHAPE_TYPE.PICTURE]
+
+class ManifestAssetTest(unittest.TestCase):
+    def generate(self, assets):
+        prs = ImprovedPPTProcessor().generate_presentation_with_manifest(SLIDES, make_template(), make_manifest(assets))
+        output = io.BytesIO()
+        prs.save(output)
+        output.seek(0)
+        return Presentation(output)
+
+    def test_asset_placed_on_every_slide_sharing_one_image_part(self):
+        prs = self.generate([{"id": "img_0_0", "left": 100, "top": 200, "width": 300000, "height": 400000, "apply_on": "all"}])
+
+        placed = [pictures(slide) for slide in prs.slides]
+        self.assertEqual([len(p) for p in placed], [1, 1, 1])
+        self.assertEqual((placed[0][0].left, placed[0][0].top, placed[0][0].width, placed[0][0].height), (100, 200, 300000, 400000))
+        self.assertEqual(len({p[0].image.sha1 for p in placed}), 1)
+        image_parts = {part.partname for part in prs.part.package.iter_parts() if part.partname.startswith('/ppt/media/')}
+        self.assertEqual(len(image_parts), 1)
+
+    def test_title_only_asset_placed_on_first_slide(self):
+        prs = self.generate([{"id": "img_0_0", "left": 0, "top": 0, "width": 1000, "height": 1000, "apply_on": "title_only"}])
+
+        self.assertEqual([len(pictures(slide)) for slide in prs.slides], [1, 0, 0])
+
+    def test_unrecognised_asset_ids_skipped(self):
+        with self.assertLogs(level='WARNING') as logs:
+            prs = self.generate([
+                {"id": "logo", "left": 0, "top": 0, "width": 1000, "height": 1000, "apply_on": "all"},
+                {"id": "img_5_0", "left": 0, "top": 0, "width": 1000, "height": 1000, "apply_on": "all"},
+            ])
+
+        self.assertEqual([len(pictures(slide)) for slide in prs.slides], [0, 0, 0])
+        self.assertTrue(any('logo' in line for line in logs.output))
+        self.assertTrue(any('img_5_0' in line for line in logs.output))
+
+class StyledParagraphsTest(unittest.TestCase):
+    def test_matches_text_then_apply_text_formatting(self):
+        processor = ImprovedPPTProcessor()
+        rules = {'family': 'Arial', 'size_pt': 18, 'bold': True}
+        for text in ('first\nsecond\n\nthird', '\nsecond'):
+            prs = Presentation()
+            expected = prs.slides.add_slide(prs.slide_layouts[1]).placeholders[1].text_frame
+            expected.text = text
+            processor._apply_text_formatting(expected, rules, {})
+            actual = prs.slides.add_slide(prs.slide_layouts[1]).placeholders[1].text_frame
+
+            processor._set_styled_paragraphs(actual, text.split('\n'), {'sz': '1800', 'b': '1'}, 'Arial')
+
+            self.assertEqual(etree.tostring(actual._txBody), etree.tostring(expected._txBody))
+
+if __name__ == '__main__':
+    unittest.main()
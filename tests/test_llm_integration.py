@@ -0,0 +1,94 @@
+"""
+Tests for the OpenAI response_format selection and slide structure caching in llm_integration
+Run with: python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import llm_integration
+from llm_integration import LLMIntegration, SLIDE_STRUCTURE_SCHEMA
+
+SLIDES = {
+    "presentation_title": "Deck",
+    "total_slides": 1,
+    "slides": [{"slide_number": 1, "title": "Intro", "type": "bullet_points",
+                "content": ["a", "b"], "speaker_notes": "Say hello."}]
+}
+
+class FakeCompletions:
+    """Records the kwargs of each chat.completions.create call and answers with a fixed reply"""
+    def __init__(self, content=None):
+        self.calls = []
+        self.content = json.dumps(SLIDES) if content is None else content
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def make_integration(model, content=None):
+    """OpenAI integration using model, with the network client replaced by FakeCompletions"""
+    integration = LLMIntegration('sk-' + 'a' * 40, 'openai')
+    integration.model = model
+    completions = FakeCompletions(content)
+    integration.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return integration, completions
+
+class OpenAIResponseFormatTest(unittest.TestCase):
+    @unittest.skipIf('OPENAI_MODEL' in os.environ, "OPENAI_MODEL overrides the default model")
+    def test_default_model_supports_structured_outputs(self):
+        self.assertTrue(llm_integration.DEFAULT_MODELS['openai'].startswith(
+            llm_integration._STRUCTURED_OUTPUT_MODEL_PREFIXES))
+
+    def test_structuring_sends_slide_schema(self):
+        integration, completions = make_integration('gpt-4o')
+
+        result = integration.structure_text_to_slides("Some text about the product. " * 10, no_cache=True)
+
+        self.assertEqual(result['slides'][0]['title'], 'Intro')
+        self.assertEqual(len(completions.calls), 1)
+        self.assertEqual(completions.calls[0]['response_format'],
+                         {"type": "json_schema", "json_schema": SLIDE_STRUCTURE_SCHEMA})
+        self.assertEqual(completions.calls[0]['temperature'], llm_integration.JSON_TEMPERATURE)
+
+    def test_json_mode_model_gets_json_object(self):
+        integration, completions = make_integration('gpt-3.5-turbo')
+
+        integration._call_openai("prompt", json_output=True, json_schema=SLIDE_STRUCTURE_SCHEMA)
+
+        self.assertEqual(completions.calls[0]['response_format'], {"type": "json_object"})
+
+    def test_original_gpt4_sends_no_response_format(self):
+        integration, completions = make_integration('gpt-4')
+
+        integration._call_openai("prompt", json_output=True, json_schema=SLIDE_STRUCTURE_SCHEMA)
+
+        self.assertNotIn('response_format', completions.calls[0])
+
+class SlideCacheTest(unittest.TestCase):
+    def test_parsed_structure_is_cached(self):
+        integration, completions = make_integration('gpt-4o')
+        text = "Cached structure input. " * 10
+
+        integration.structure_text_to_slides(text)
+        integration.structure_text_to_slides(text)
+
+        self.assertEqual(len(completions.calls), 1)
+
+    def test_fallback_structure_is_not_cached(self):
+        integration, completions = make_integration('gpt-4o', content="Slide 1: Intro\n- not json at all")
+        text = "Fallback structure input. " * 10
+
+        first = integration.structure_text_to_slides(text)
+        integration.structure_text_to_slides(text)
+
+        self.assertTrue(first['slides'])
+        self.assertEqual(len(completions.calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()